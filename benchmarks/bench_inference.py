@@ -0,0 +1,78 @@
+# BENCHMARK — predict_proba throughput: fitted sklearn models vs their compiled form (src/inference.py)
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_inference --n-samples 400 --n-features 30
+
+import time
+import argparse
+import warnings
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+
+from benchmarks.synthetic import make_radiomics
+from src.models import get_models_and_params
+from src.inference import compile_model
+
+warnings.filterwarnings("ignore")
+
+
+def rows_per_second(predict, X, batch_size, min_time=0.5):
+    batch = np.resize(X, (batch_size, X.shape[1]))
+    predict(batch)                                   # warm-up
+    calls, start = 0, time.perf_counter()
+    while True:
+        predict(batch)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * batch_size / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows/second of sklearn vs compiled predict_proba")
+    parser.add_argument("--n-samples", type=int, default=400)
+    parser.add_argument("--n-features", type=int, default=30)
+    parser.add_argument("--batch-sizes", default="1,64,4096")
+    parser.add_argument("--models", default=None, help="models to time (default: all)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument("--output", default="results/benchmarks")
+    args = parser.parse_args()
+
+    X, y, _ = make_radiomics(args.n_samples, args.n_features, random_state=42)
+    X = ((X - X.mean()) / X.std()).values
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    models, _ = get_models_and_params()
+    if args.models:
+        models = {k: v for k, v in models.items() if k in args.models.split(",")}
+
+    rows = []
+    for model_name, model in models.items():
+        try:
+            est = Pipeline([("clf", clone(model))]).fit(X, y)
+        except Exception as e:
+            print(f"    {model_name} failed: {e}")
+            continue
+        compiled = compile_model(est)
+        max_diff = np.abs(compiled.predict_proba(X) - est.predict_proba(X)).max()
+        for batch_size in batch_sizes:
+            sk = rows_per_second(est.predict_proba, X, batch_size, args.min_time)
+            fast = rows_per_second(compiled.predict_proba, X, batch_size, args.min_time)
+            rows.append({"model": model_name, "batch_size": batch_size, "sklearn_rows_s": sk,
+                         "compiled_rows_s": fast, "speedup": fast / sk, "max_abs_diff": max_diff,
+                         "fallback": ",".join(compiled.fallback_ops())})
+            print(f" {model_name:32s} batch={batch_size:5d}: {sk:12.0f} → {fast:12.0f} rows/s ({fast / sk:5.1f}×)")
+
+    df = pd.DataFrame(rows)
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output / "bench_inference.csv", index=False)
+    print("\n Speedup (compiled / sklearn):")
+    print(df.pivot_table(index="model", columns="batch_size", values="speedup", sort=False).round(1))
+    print(f"\n Results saved to: {output / 'bench_inference.csv'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# BENCHMARK — nested n_jobs=-1 (old defaults) vs the CPU budget scheduler (src/resources.py)
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_parallelism --n-samples 600 --n-features 200
+
+import time
+import argparse
+from pathlib import Path
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import make_scorer, f1_score
+
+from benchmarks.synthetic import make_radiomics
+from src.models import get_models_and_params
+from src.resources import available_cpus, budget_for
+
+
+def all_threads(estimator):
+    # Old behaviour: every level that accepts n_jobs uses every core
+    keys = [k for k in estimator.get_params(deep=True) if k == "n_jobs" or k.endswith("__n_jobs")]
+    return estimator.set_params(**{k: -1 for k in keys})
+
+
+def time_cv(pipeline, X, y, cv, scorer, budgeted):
+    start = time.perf_counter()
+    if budgeted:
+        with budget_for(pipeline, *X.shape, n_tasks=cv.get_n_splits()) as n_jobs:
+            cross_val_score(pipeline, X, y, cv=cv, scoring=scorer, n_jobs=n_jobs)
+    else:
+        cross_val_score(all_threads(pipeline), X, y, cv=cv, scoring=scorer, n_jobs=-1)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare nested n_jobs=-1 with the CPU budget scheduler")
+    parser.add_argument("--n-samples", type=int, default=600)
+    parser.add_argument("--n-features", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="results/benchmarks")
+    args = parser.parse_args()
+
+    X, y, _ = make_radiomics(args.n_samples, args.n_features, random_state=42)
+    X = (X - X.mean()) / X.std()
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    scorer = make_scorer(f1_score, average="weighted")
+    models, _ = get_models_and_params()
+
+    print(f" CPUs available: {available_cpus()} | data: {X.shape[0]} × {X.shape[1]}")
+    rows = []
+    for model_name, model in models.items():
+        times = {}
+        for mode in ["nested_all_cores", "budgeted"]:
+            runs = []
+            for _ in range(args.repeats):
+                try:
+                    runs.append(time_cv(Pipeline([("clf", model)]), X, y, cv, scorer, mode == "budgeted"))
+                except Exception as e:
+                    print(f"    {model_name} ({mode}) failed: {e}")
+                    break
+            times[mode] = min(runs) if runs else float("nan")
+        speedup = times["nested_all_cores"] / times["budgeted"]
+        rows.append({"Model": model_name, **times, "speedup": speedup})
+        print(f"    {model_name}: nested={times['nested_all_cores']:.2f}s | "
+              f"budgeted={times['budgeted']:.2f}s | speedup ×{speedup:.2f}")
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(rows)
+    df.to_csv(output / "bench_parallelism.csv", index=False)
+    print(f"\n Total: nested={df['nested_all_cores'].sum():.1f}s | budgeted={df['budgeted'].sum():.1f}s")
+    print(f" Results saved to: {(output / 'bench_parallelism.csv').resolve()}")
+
+
+if __name__ == "__main__":
+    main()
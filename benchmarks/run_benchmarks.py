@@ -0,0 +1,148 @@
+# BENCHMARKS — times the pipeline stages on synthetic radiomics data of increasing size
+#
+# Usage (from the repository root):
+#   python -m benchmarks.run_benchmarks --sizes 200x100,400x500,800x2000
+#   python -m benchmarks.run_benchmarks --quick
+
+import os
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from benchmarks.synthetic import make_radiomics
+from src.preprocessing import RadiomicsPreprocessor
+from src.split_and_check import split_and_check
+from src.feature_selection import FS_METHODS
+from src.models import get_models_and_params
+from src.evaluation import compare_models, run_experiments
+from src.screening import screen_candidates
+from src.profiling import profiler, profile_stage
+from src.visualization import plot_queue
+
+
+def parse_sizes(text):
+    return [tuple(int(v) for v in size.split("x")) for size in text.split(",")]
+
+
+def benchmark_size(n_samples, n_features, methods, model_names, halving, random_state, workdir):
+    X, y, centers = make_radiomics(n_samples, n_features, random_state=random_state)
+
+    with profile_stage("split_and_check"):
+        split_and_check(X, y, centers=centers, n_splits=3, random_state=random_state,
+                        output_dir=os.path.join(workdir, "split_report"))
+
+    # Same chain as main.py (Yeo-Johnson -> ComBat over centers -> filters); its steps are nested stages
+    with profile_stage("preprocessing", n_features_in=X.shape[1]):
+        preprocessor = RadiomicsPreprocessor(variance_threshold=0.01, corr_threshold=0.85, alpha=0.1)
+        X_fs_input = preprocessor.fit(X, y, centers=centers).transform(X, centers=centers)
+
+    selected_datasets = {}
+    for name in methods:
+        func, kwargs = FS_METHODS[name]
+        try:
+            with profile_stage(f"fs/{name}", n_features_in=X_fs_input.shape[1]):
+                selected = func(X_fs_input, pd.Series(y), **kwargs)
+            if selected:
+                selected_datasets[name] = X_fs_input[selected]
+        except Exception as e:
+            print(f"    {name} failed: {e}")
+
+    models, params = get_models_and_params()
+    models = {k: v for k, v in models.items() if model_names is None or k in model_names}
+
+    # Screening and the comparison of its survivors run as in main.py;
+    # the halving search runs on one feature set, as a fixed-size workload
+    if selected_datasets:
+        with profile_stage("screening"):
+            survivors, _ = screen_candidates(selected_datasets, y, models)
+        with profile_stage("model_comparison"):
+            compare_models(selected_datasets, y, models, pairs=survivors)
+        fs_name = next(iter(selected_datasets))
+        one_set = {fs_name: selected_datasets[fs_name]}
+        if halving:
+            with profile_stage("run_experiments"):
+                run_experiments(one_set, y, models, params, cv=3)
+
+
+def summarize(records):
+    df = pd.DataFrame(records)
+    top = df[df["depth"] == 0][["stage", "n_samples", "n_features"]].rename(columns={"stage": "size"})
+    df["size"] = df["stage"].str.split("/").str[0]
+    df = df[df["depth"] > 0].drop(columns=["n_samples", "n_features"], errors="ignore")
+    df["stage"] = df["stage"].str.split("/", n=1).str[1]
+    return df.merge(top, on="size")
+
+
+def plot_scaling(df, path):
+    stages = df[df["depth"] == 1]
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for stage, grp in stages.groupby("stage"):
+        grp = grp.sort_values("n_features")
+        axes[0].plot(grp["n_features"], grp["wall_s"], marker="o", label=stage)
+        axes[1].plot(grp["n_features"], grp["peak_rss_mb"], marker="o", label=stage)
+    axes[0].set(xscale="log", yscale="log", xlabel="n_features", ylabel="wall time (s)")
+    axes[1].set(xscale="log", xlabel="n_features", ylabel="peak RSS (MB)")
+    axes[0].legend(fontsize=7, ncol=2)
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the radiomics pipeline on synthetic data")
+    parser.add_argument("--sizes", default="200x100,400x500,800x2000",
+                        help="comma separated n_samples x n_features")
+    parser.add_argument("--methods", default=",".join(FS_METHODS), help="feature selectors to time")
+    parser.add_argument("--models", default=None, help="models to time (default: all)")
+    parser.add_argument("--no-halving", action="store_true", help="skip run_experiments")
+    parser.add_argument("--quick", action="store_true",
+                        help="small sizes, cheap selectors, two models, no halving search")
+    parser.add_argument("--output", default="results/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes = "150x60,300x200"
+        args.methods = "CorrSF,SES,LASSO,RF-Importance"
+        args.models = "Random Forest,Logistic Regression"
+        args.no_halving = True
+
+    sizes = parse_sizes(args.sizes)
+    methods = [m for m in args.methods.split(",") if m in FS_METHODS]
+    model_names = args.models.split(",") if args.models else None
+    output = Path(args.output).resolve()
+    output.mkdir(parents=True, exist_ok=True)
+
+    # Stages write to data/...; keep those side effects out of the working tree
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        plot_queue.start()
+        try:
+            for n_samples, n_features in sizes:
+                print(f"\n=== Benchmark: {n_samples} samples × {n_features} features ===")
+                with profile_stage(f"{n_samples}x{n_features}", n_samples=n_samples, n_features=n_features):
+                    benchmark_size(n_samples, n_features, methods, model_names,
+                                   not args.no_halving, args.seed, workdir)
+            plot_queue.wait()
+        finally:
+            os.chdir(cwd)
+
+    df = summarize(profiler.records)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = output / f"benchmark_{stamp}.csv"
+    df.to_csv(csv_path, index=False)
+    plot_scaling(df, output / f"benchmark_{stamp}.png")
+
+    print("\n Benchmark summary (wall seconds):")
+    print(df[df["depth"] == 1].pivot_table(index="stage", columns="size", values="wall_s", sort=False))
+    print(f"\n Results saved to: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
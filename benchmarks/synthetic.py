@@ -0,0 +1,48 @@
+#Import libraries + packages
+import numpy as np
+import pandas as pd
+
+FEATURE_FAMILIES = ["firstorder", "glcm", "glrlm", "glszm", "gldm", "ngtdm", "shape"]
+
+
+# Synthetic radiomics cohort: correlated feature blocks, class imbalance, multi-center shifts
+def make_radiomics(n_samples=300, n_features=500, n_classes=3, class_weights=(0.55, 0.3, 0.15),
+                   n_centers=4, block_size=25, informative_fraction=0.1, block_corr=0.8,
+                   class_sep=0.8, center_shift=0.5, random_state=42):
+    rng = np.random.default_rng(random_state)
+
+    # Labels with realistic imbalance (extra classes share the remaining weight)
+    w = np.array(list(class_weights)[:n_classes] + [0.05] * max(0, n_classes - len(class_weights)), dtype=float)
+    y = rng.choice(n_classes, size=n_samples, p=w / w.sum())
+
+    # Centers of unequal size
+    center_p = rng.dirichlet(np.full(n_centers, 3.0))
+    centers = rng.choice(n_centers, size=n_samples, p=center_p)
+
+    # Each block = one latent factor + noise -> within-block correlation ~ block_corr
+    n_blocks = int(np.ceil(n_features / block_size))
+    block_of = np.repeat(np.arange(n_blocks), block_size)[:n_features]
+    latent = rng.standard_normal((n_samples, n_blocks))
+
+    informative = rng.random(n_blocks) < informative_fraction
+    informative[0] = True
+    class_means = rng.normal(0, class_sep, size=(n_classes, n_blocks)) * informative
+    latent += class_means[y]
+
+    loadings = np.sqrt(block_corr) * rng.choice([-1.0, 1.0], size=n_features)
+    noise = rng.standard_normal((n_samples, n_features)) * np.sqrt(1 - block_corr)
+    Z = latent[:, block_of] * loadings + noise
+
+    # Scanner/site effects: additive and multiplicative per center and feature
+    add = rng.normal(0, center_shift, size=(n_centers, n_features))
+    mult = np.exp(rng.normal(0, center_shift / 2, size=(n_centers, n_features)))
+    Z = Z * mult[centers] + add[centers]
+
+    # Skewed, positive-valued features like most radiomics (log-normal with per-feature scale)
+    scale = np.exp(rng.uniform(-2, 6, size=n_features))
+    X = np.exp(0.5 * Z) * scale
+
+    names = [f"original_{FEATURE_FAMILIES[b % len(FEATURE_FAMILIES)]}_f{i:05d}" for i, b in enumerate(block_of)]
+    X = pd.DataFrame(X, columns=names)
+    centers = pd.Series([f"center_{c}" for c in centers], name="center")
+    return X, y, centers
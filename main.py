@@ -1,23 +1,61 @@
 # RADIOMICS PIPELINE — Load Data + Split + Preprocess + FS + Modeling + Halving + Explainability
 
+import sys
+import atexit
+import argparse
+import joblib
 import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import StratifiedKFold, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import make_scorer, f1_score
 
 # === Import internal modules ===
 from src.load_data import load_and_clean
 from src.split_and_check import split_and_check
-from src.preprocessing import variance_filter, correlation_filter, stat_filter, PowerTransformer
-from src.feature_selection import (
-    fs_mrmr, fs_relieff, fs_corrsf, fs_ses, fs_boruta,
-    fs_rfe_svm, fs_genetic, fs_lasso, fs_hsic_lasso, fs_rf_importance
-)
+from src.preprocessing import RadiomicsPreprocessor
+from src.feature_selection import FS_METHODS
+from src.stability import stability_selection
 from src.models import get_models_and_params
-from src.evaluation import run_experiments  
-from src import explainability            
+from src.evaluation import run_experiments, compare_models
+from src import explainability
+from src.profiling import profiler, profile_stage
+from src.executor import BACKENDS, SCHEMES
+from src.screening import screen_candidates, select_for_tuning
+from src.visualization import plot_queue, render_all
+from src.results_store import ExperimentStore
+from joblib import hash as joblib_hash
+
+# === Command line options === #
+parser = argparse.ArgumentParser(description="NSCLC radiomics pipeline")
+parser.add_argument("--profile", action="store_true", help="dump a cProfile file per top-level stage")
+parser.add_argument("--profile-dir", default="data/profiling", help="where the run report is written")
+parser.add_argument("--backend", default="loky", choices=BACKENDS, help="executor backend for the model comparison grid")
+parser.add_argument("--no-screening", action="store_true", help="fully cross-validate every (feature set, model) pair")
+parser.add_argument("--cv-scheme", default="kfold", choices=SCHEMES,
+                    help="model comparison: (repeated) stratified k-fold or .632+ bootstrap")
+parser.add_argument("--repeats", type=int, default=1,
+                    help="CV repeats / bootstrap replicates; stored repeats are reused, so this can grow run by run")
+parser.add_argument("--stability-resamples", type=int, default=0,
+                    help="subsamples per method for stability selection (0 = skip); cached resamples are reused, "
+                         "so raising this later only computes the new ones")
+parser.add_argument("--top-fs", type=int, default=3, help="number of feature sets promoted to the halving search")
+parser.add_argument("--n-explain", type=int, default=50,
+                    help="test samples explained with SHAP (0 = the whole test split)")
+parser.add_argument("--chunk-size", type=int, default=32, help="samples per SHAP chunk")
+plot_mode = parser.add_mutually_exclusive_group()
+plot_mode.add_argument("--no-plots", action="store_true", help="only cache plot data, do not render figures")
+plot_mode.add_argument("--plots-only", action="store_true", help="re-render all figures from cached plot data and exit")
+args = parser.parse_args()
+
+if args.plots_only:
+    render_all(plot_queue.data_dir)
+    sys.exit(0)
+
+profiler.output_dir = args.profile_dir
+profiler.cprofile = args.profile
+plot_queue.enabled = not args.no_plots
+atexit.register(profiler.save)
+atexit.register(plot_queue.wait)
+# render workers are forked here, before any profiler stage starts its sampler thread
+plot_queue.start()
 
 # === Paths === #
 base = Path("data")
@@ -25,7 +63,9 @@ path = base / "radiomics features.xlsx"
 split_dir = base / "split_report"
 features_dir = base / "selected_features"
 results_dir = base / "model_results"
-for d in [split_dir, features_dir, results_dir]:
+stability_dir = features_dir / "stability"
+preprocessor_path = base / "preprocessor.joblib"
+for d in [split_dir, features_dir, results_dir, stability_dir]:
     d.mkdir(parents=True, exist_ok=True)
 
 # === Load dataset === #
@@ -35,12 +75,14 @@ if not path.exists():
 
 print(f"Found dataset: {path.name}")
 print("\n Loading and Cleaning Dataset: ")
-X, y = load_and_clean(path)
+with profile_stage("load_data"):
+    X, y = load_and_clean(path)
 
 # === Load and align center info === #
 print("\n Loading center information: ")
 try:
-    df_centers = pd.read_excel(path, usecols=["center"])
+    with profile_stage("load_centers"):
+        df_centers = pd.read_excel(path, usecols=["center"])
     centers = df_centers.loc[X.index, "center"].astype(str)
     print(f"   Loaded {centers.nunique()} unique centers: {centers.unique().tolist()}")
     print(f"   Centers aligned with dataset: {len(centers)} entries.")
@@ -50,93 +92,101 @@ except Exception as e:
 
 # === Split & Heterogeneity Check === #
 print("\n Creating stratified & grouped folds by center: ")
-splits, fold_assignments, report = split_and_check(
-    X, y, centers=centers, n_splits=3, random_state=42, output_dir=split_dir
-)
+with profile_stage("split_and_check"):
+    splits, fold_assignments, report = split_and_check(
+        X, y, centers=centers, n_splits=3, random_state=42, output_dir=split_dir
+    )
 
 print("\n Heterogeneity Summary:")
 print(f"   mean_label_std:  {report['mean_label_std']:.2f}%")
 if "mean_center_std" in report and not pd.isna(report["mean_center_std"]):
     print(f"   mean_center_std: {report['mean_center_std']:.2f}%")
 print(f"\n Split & Heterogeneity check completed.")
-print(f"   Heatmaps saved in: {split_dir.resolve()}")
+print(f"   Heatmaps queued for: {split_dir.resolve()}")
 
 # === Preprocessing === #
 print("\n Starting preprocessing: ")
-pt = PowerTransformer(method='yeo-johnson', standardize=True)
-X = pd.DataFrame(pt.fit_transform(X), columns=X.columns, index=X.index)
+with profile_stage("preprocessing"):
+    preprocessor = RadiomicsPreprocessor(variance_threshold=0.01, corr_threshold=0.85, alpha=0.1)
+    # ComBat harmonization across centers runs inside the chain when centers are available.
+    # Like the filters and feature selection below, it is fitted once on the whole cohort before CV.
+    X = preprocessor.fit(X, y, centers=centers).transform(X, centers=centers)
 
-print(" VarianceThreshold filter...")
-X = variance_filter(X, threshold=0.01)
-print(f"   Remaining features: {X.shape[1]}")
-
-print(" Removing highly correlated features: ")
-X = correlation_filter(X, threshold=0.85)
-print(f"   Remaining features: {X.shape[1]}")
-
-print(" Kruskal/Mann–Whitney filtering: ")
-X = stat_filter(X, y, alpha=0.1)
-print(f"   Remaining features: {X.shape[1]}")
+# Fitted chain (kept columns + Yeo-Johnson/ComBat parameters) for explainability / scoring
+joblib.dump(preprocessor, preprocessor_path)
 
 print("\n Preprocessing completed successfully.")
 print(f"   Final feature count: {X.shape[1]}")
+print(f"   Fitted preprocessor saved to: {preprocessor_path.resolve()}")
 
 # === Feature Selection === #
 print("\n Running Feature Selection methods...")
 
-methods = {
-    "mRMR": lambda: fs_mrmr(X, y, top_k=20),
-    "ReliefF": lambda: fs_relieff(X, y, top_k=20),
-    "CorrSF": lambda: fs_corrsf(X, y, top_k=20),
-    "SES": lambda: fs_ses(X, y, alpha=0.1),
-    "Boruta": lambda: fs_boruta(X, y),
-    "RFE-SVM": lambda: fs_rfe_svm(X, y, n_features=20),
-    "Genetic": lambda: fs_genetic(X, y, top_k=20),
-    "LASSO": lambda: fs_lasso(X, y),
-    "HSIC-LASSO": lambda: fs_hsic_lasso(X, y, top_k=20),
-    "RF-Importance": lambda: fs_rf_importance(X, y, top_k=20)
-}
-
 selected_datasets = {}
-for name, func in methods.items():
-    try:
-        selected = func()
-        selected_datasets[name] = X[selected]
-        pd.Series(selected).to_csv(features_dir / f"selected_{name}.csv", index=False)
-        print(f"  {name}: {len(selected)} features saved.")
-    except Exception as e:
-        print(f"    {name} failed: {e}")
+with profile_stage("feature_selection"):
+    for name, (func, kwargs) in FS_METHODS.items():
+        try:
+            with profile_stage(name, n_features_in=X.shape[1]):
+                selected = func(X, y, **kwargs)
+            if not selected:
+                print(f"  {name}: no features selected, skipped.")
+                continue
+            selected_datasets[name] = X[selected]
+            pd.Series(selected).to_csv(features_dir / f"selected_{name}.csv", index=False)
+            print(f"  {name}: {len(selected)} features saved.")
+        except Exception as e:
+            print(f"    {name} failed: {e}")
 
 print("\n  Feature selection completed.")
 print(f"   Results saved to: {features_dir.resolve()}")
 
+# === Stability Selection === #
+if args.stability_resamples > 0:
+    print(f"\n Running stability selection ({args.stability_resamples} subsamples per method)...")
+    stability_summary = []
+    with profile_stage("stability_selection"):
+        for name in FS_METHODS:
+            try:
+                with profile_stage(name, n_fits=args.stability_resamples):
+                    stab = stability_selection(name, X, y, n_resamples=args.stability_resamples)
+                stab["frequency"].to_csv(stability_dir / f"frequency_{name}.csv")
+                stability_summary.append({
+                    "FeatureSelection": name,
+                    "Jaccard": stab["jaccard"],
+                    "Kuncheva": stab["kuncheva"]
+                })
+            except Exception as e:
+                print(f"    {name} stability failed: {e}")
+    pd.DataFrame(stability_summary).to_csv(stability_dir / "stability_summary.csv", index=False)
+    print(f"   Stability results saved to: {stability_dir.resolve()}")
+
 # === MODEL TRAINING (CROSS-VALIDATION) === #
 print("\n Starting model evaluation across feature selection methods: ")
 
 models, params = get_models_and_params()
-cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
-scorer = make_scorer(f1_score, average="weighted")
 
-results = []
-for fs_name, X_fs in selected_datasets.items():
-    print(f"\n Evaluating models using features from {fs_name} ({X_fs.shape[1]} features)...")
-    for model_name, model in models.items():
-        try:
-            pipeline = Pipeline([("clf", model)])
-            scores = cross_val_score(pipeline, X_fs, y, cv=cv, scoring=scorer, n_jobs=-1)
-            acc_scores = cross_val_score(pipeline, X_fs, y, cv=cv, scoring="accuracy", n_jobs=-1)
-            results.append({
-                "FeatureSelection": fs_name,
-                "Model": model_name,
-                "F1_mean": scores.mean(),
-                "F1_std": scores.std(),
-                "Accuracy_mean": acc_scores.mean()
-            })
-            print(f"    {model_name}: F1={scores.mean():.3f} ± {scores.std():.3f} | Acc={acc_scores.mean():.3f}")
-        except Exception as e:
-            print(f"    {model_name} failed: {e}")
-
-df_results = pd.DataFrame(results)
+# Every result of this run goes to the experiment store as soon as it exists
+store = ExperimentStore(base / "experiments.sqlite")
+config = {"fs_methods": {k: kw for k, (_, kw) in FS_METHODS.items()}, "param_grids": params, "n_splits": 3,
+          "cv_scheme": args.cv_scheme, "repeats": args.repeats}
+config_hash = joblib_hash(config)
+run_id = store.start_run(data_hash=joblib_hash((X, y)), config=config, config_hash=config_hash)
+print(f"   Experiment store: {store.path} (run #{run_id})")
+
+# Screening on stratified subsamples; only the surviving pairs get full CV
+survivors = None
+if not args.no_screening:
+    with profile_stage("screening"):
+        survivors, screening_log = screen_candidates(selected_datasets, y, models, random_state=42,
+                                                     backend=args.backend, store=store)
+    screening_log.to_csv(results_dir / "screening_log.csv", index=False)
+
+with profile_stage("model_comparison"):
+    df_results = compare_models(selected_datasets, y, models, n_splits=3, random_state=42,
+                                backend=args.backend, store=store, pairs=survivors,
+                                scheme=args.cv_scheme, n_repeats=args.repeats)
+
+store.add_comparison(df_results, run_id=run_id)
 df_results.to_csv(results_dir / "model_comparison.csv", index=False)
 
 print("\n Model comparison summary:")
@@ -146,17 +196,25 @@ print(f"\n All results saved in: {results_dir.resolve()}")
 # ===  ADVANCED EVALUATION (HALVING RANDOM SEARCH) === #
 print("\n Starting advanced evaluation with Halving Random Search: ")
 
-# Επιλογή top Feature Selection sets
-top_fs = {k: v for k, v in selected_datasets.items() if k in ["LASSO", "RFE-SVM", "SES"]}
+# Επιλογή top Feature Selection sets (από τα αποτελέσματα του full CV)
+top_fs_names, top_models = select_for_tuning(df_results, n_feature_sets=args.top_fs)
+top_fs = {k: selected_datasets[k] for k in top_fs_names}
+top_pairs = set(zip(df_results["FeatureSelection"], df_results["Model"]))
+print(f"   Tuning {len(top_models)} models on: {', '.join(top_fs_names)}")
 
 # Advanced search
-halving_results = run_experiments(
-    selected_datasets=top_fs,
-    y=y,
-    models=models,
-    param_grids=params,
-    cv=3
-)
+with profile_stage("halving_search"):
+    halving_results = run_experiments(
+        selected_datasets=top_fs,
+        y=y,
+        models=models,
+        param_grids=params,
+        cv=3,
+        store=store,
+        run_id=run_id,
+        config_hash=config_hash,
+        pairs=top_pairs
+    )
 
 print("\n Halving Search completed successfully!")
 print(halving_results.sort_values(by='F1_score', ascending=False).head(10))
@@ -164,10 +222,14 @@ print(halving_results.sort_values(by='F1_score', ascending=False).head(10))
 # ===  EXPLAINABILITY (SHAP + LIME) === #
 try:
     print("\n Launching explainability analysis (SHAP + LIME)...")
-    explainability.run_explainability()
+    with profile_stage("explainability"):
+        explainability.run_explainability(store=store, run_id=run_id, n_explain=args.n_explain or None,
+                                          chunk_size=args.chunk_size)
     print("\n Explainability module completed successfully!")
 except Exception as e:
     print(f" Explainability analysis skipped due to error: {e}")
 
-print("\n  Full radiomics pipeline completed successfully! ")
+print("\n Waiting for background plot rendering...")
+plot_queue.wait()
 
+print("\n  Full radiomics pipeline completed successfully! ")
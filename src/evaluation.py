@@ -7,18 +7,62 @@ from sklearn.metrics import f1_score, make_scorer
 from imblearn.over_sampling import ADASYN
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 import warnings
+from joblib import hash as joblib_hash
+from src.profiling import profile_stage
+from src.resources import plan_parallelism, set_threads
+from src.executor import make_cv_tasks, run_tasks, summarize_folds, summarize_repeats, estimator_signature, profile_tasks
+from src.results_store import ExperimentStore
+from src.visualization import plot_queue
 
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
+#cross-validate every model on every feature set (no tuning), or only the given (fs, model) pairs
+#each (feature set, model, fold) is one executor task, so interrupted runs resume
+#n_repeats > 1 or scheme="bootstrap" (.632+) adds 95% confidence intervals on F1, accuracy and AUC;
+#repeats already in the store are reused, so repeats can be added run by run
+def compare_models(selected_datasets, y, models, n_splits=3, random_state=42, backend="loky", store=None,
+                   pairs=None, scheme="kfold", n_repeats=1, confidence=0.95):
+    tasks = make_cv_tasks(selected_datasets, y, models, n_splits=n_splits, random_state=random_state, pairs=pairs,
+                          scheme=scheme, n_repeats=n_repeats)
+    with profile_stage("cv_tasks", n_fits=len(tasks)):
+        fold_results = run_tasks(tasks, selected_datasets, y, models, backend=backend, store=store)
+    profile_tasks(fold_results)
+
+    failed = fold_results[fold_results["status"] == "failed"].drop_duplicates(["fs_name", "model_name"])
+    for _, row in failed.iterrows():
+        print(f"    {row['fs_name']} / {row['model_name']} failed: {row['error']}")
+
+    repeated = scheme == "bootstrap" or n_repeats > 1
+    summary = summarize_repeats(fold_results, confidence) if repeated else summarize_folds(fold_results)
+    for fs_name, group in summary.groupby("fs_name", sort=False):
+        print(f"\n Models using features from {fs_name} ({selected_datasets[fs_name].shape[1]} features):")
+        for _, row in group.iterrows():
+            if repeated:
+                print(f"    {row['model_name']}: F1={row['F1_mean']:.3f} [{row['F1_ci_low']:.3f}, {row['F1_ci_high']:.3f}]"
+                      f" | Acc={row['Accuracy_mean']:.3f} | AUC={row['AUC_mean']:.3f}")
+            else:
+                print(f"    {row['model_name']}: F1={row['F1_mean']:.3f} ± {row['F1_std']:.3f} | Acc={row['Accuracy_mean']:.3f}")
+
+    summary = summary.rename(columns={"fs_name": "FeatureSelection", "model_name": "Model"})
+    columns = ["FeatureSelection", "Model", "F1_mean", "F1_std", "Accuracy_mean"]
+    if repeated:
+        columns += ["F1_ci_low", "F1_ci_high", "Accuracy_ci_low", "Accuracy_ci_high",
+                    "AUC_mean", "AUC_ci_low", "AUC_ci_high", "n_repeats"]
+    return summary[columns]
+
+
 #execute halving search for each classifier
 #adasyn balancing
-def run_experiments(selected_datasets, y, models, param_grids, cv=2):
+#each finished search is written to the experiment store; searches already stored are reused
+#pairs, if given, limits the searches to those (fs, model) combinations
+def run_experiments(selected_datasets, y, models, param_grids, cv=2, store=None, run_id=None, config_hash=None,
+                    pairs=None):
     results = []
     os.makedirs("data", exist_ok=True)
+    store = store if store is not None else ExperimentStore()
 
     for fs_name, X_sel in selected_datasets.items():
         print(f"\n Running Halving Search for feature set: {fs_name} ({X_sel.shape[1]} features)")
@@ -27,30 +71,54 @@ def run_experiments(selected_datasets, y, models, param_grids, cv=2):
         # Data balancing with adasyn
         print(" Balancing data with ADASYN: ")
         ada = ADASYN(sampling_strategy="auto", random_state=42, n_neighbors=3)
-        X_bal, y_bal = ada.fit_resample(X_sel, y)
+        with profile_stage(f"{fs_name}/ADASYN"):
+            X_bal, y_bal = ada.fit_resample(X_sel, y)
         print(f" Balanced dataset: {len(y)} → {len(y_bal)} samples")
+        data_hash = joblib_hash((X_sel, np.asarray(y)))
 
         for model_name, clf in models.items():
+            if pairs is not None and (fs_name, model_name) not in pairs:
+                continue
             print(f"\n Evaluating: {model_name} ")
             pipe = Pipeline([
                 ("scaler", StandardScaler()),
                 ("clf", clf)
             ])
+            grid = param_grids.get(model_name, {})
+            search_key = joblib_hash((data_hash, estimator_signature(pipe), grid, cv, "halving", 4, 42))
+            previous = store.find_search(search_key)
+            if previous is not None:
+                # same data + settings: scores and params carry over, names are this run's
+                store.reuse_search(previous["search_id"], fs_name, model_name, run_id=run_id, search_key=search_key,
+                                   data_hash=data_hash, config_hash=config_hash)
+                print(f" {model_name}: F1 = {previous['F1_score']:.4f} (reused stored search #{previous['search_id']})")
+                results.append({"FS_method": fs_name, "Classifier": model_name,
+                                "F1_score": previous["F1_score"], "Best_params": previous["Best_params"]})
+                continue
+
+            n_candidates = int(np.prod([len(v) for v in grid.values()])) if grid else 1
+            n_jobs, inner = plan_parallelism(*X_bal.shape, pipe, n_tasks=n_candidates * skf.get_n_splits())
+            set_threads(pipe, inner)
 
             search = HalvingRandomSearchCV(
                 estimator=pipe,
-                param_distributions=param_grids.get(model_name, {}),
+                param_distributions=grid,
                 scoring=make_scorer(f1_score, average="weighted"),
                 cv=skf,
                 factor=4,                      # faster halving
                 min_resources='smallest',       
                 random_state=42,
-                n_jobs=-1,
+                n_jobs=n_jobs,
                 verbose=1,
                 error_score=0.0
             )
 
-            search.fit(X_bal, y_bal)
+            with profile_stage(f"{fs_name}/{model_name}") as stage:
+                search.fit(X_bal, y_bal)
+                # one fit per (candidate, iteration, fold) + the final refit
+                stage["n_fits"] = len(search.cv_results_["params"]) * skf.get_n_splits() + 1
+            store.add_search(fs_name, model_name, search, run_id=run_id, search_key=search_key,
+                             data_hash=data_hash, config_hash=config_hash, fit_seconds=stage["wall_s"])
             best_score = search.best_score_
             best_params = search.best_params_
 
@@ -63,19 +131,14 @@ def run_experiments(selected_datasets, y, models, param_grids, cv=2):
                 "Best_params": best_params
             })
 
-    # Results
+    # Results (CSV is only a snapshot of this call; the experiment store is the record)
     results_df = pd.DataFrame(results)
     csv_path = "data/halving_results.csv"
     results_df.to_csv(csv_path, index=False)
 
-    # Visualization
-    plt.figure(figsize=(10, 6))
-    plt.barh(results_df["Classifier"], results_df["F1_score"], color="skyblue")
-    plt.xlabel("Weighted F1-score")
-    plt.title(f"Halving Random Search — {fs_name}")
-    plt.tight_layout()
-    plt.savefig("data/halving_results.png", dpi=300)
-    plt.close()
+    # Visualization (rendered in the background)
+    plot_queue.submit("halving", "data/halving_results.png", results_df=results_df,
+                      title=f"Halving Random Search — {', '.join(selected_datasets)}")
 
-    print(f"\n Results saved to {csv_path}")
+    print(f"\n Results saved to {store.path} (snapshot: {csv_path})")
     return results_df
@@ -0,0 +1,272 @@
+#Import libraries + packages
+import json
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, hash as joblib_hash
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import f1_score, accuracy_score, roc_auc_score
+from scipy.stats import t as student_t
+
+from src.resources import cpu_count, plan_parallelism, set_threads
+from src.profiling import profiler
+
+BACKENDS = ("serial", "loky", "dask")
+SCHEMES = ("kfold", "bootstrap")
+
+
+# Estimator identity for hashing: hyperparameters only (n_jobs and object ids excluded)
+def estimator_signature(estimator):
+    signature = {"__class__": type(estimator).__name__}
+    for key, value in estimator.get_params(deep=True).items():
+        if key == "n_jobs" or key.endswith("__n_jobs"):
+            continue
+        if hasattr(value, "get_params"):
+            value = type(value).__name__
+        elif isinstance(value, (list, tuple)) and value and all(
+                isinstance(v, tuple) and len(v) == 2 and hasattr(v[1], "get_params") for v in value):
+            value = [(name, type(est).__name__) for name, est in value]
+        signature[key] = value
+    return signature
+
+
+# The split seed is part of the task, so a fit is cached by (split seed, fold, params, data).
+# X_hash / y_hash are joblib hashes of the data, computed once per feature set by the caller.
+def task_hash(task, X_hash, y_hash, signature):
+    return joblib_hash((
+        {k: v for k, v in task.items() if k not in ("hash", "repeat")},
+        X_hash, y_hash, signature,
+    ))
+
+
+# One task = one fit of (feature set, model, params) on one CV fold (or one bootstrap replicate).
+# Repeat r uses split seed random_state + r, so adding repeats never recomputes earlier ones.
+def make_cv_tasks(selected_datasets, y, models, param_sets=None, n_splits=3, random_state=42, pairs=None,
+                  scheme="kfold", n_repeats=1):
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown CV scheme: {scheme} (choose from {SCHEMES})")
+    folds = 1 if scheme == "bootstrap" else n_splits
+    y_hash = joblib_hash(np.asarray(y))
+    tasks = []
+    for fs_name, X_fs in selected_datasets.items():
+        if pairs is not None and not any(fs == fs_name for fs, _ in pairs):
+            continue
+        X_hash = joblib_hash(X_fs)
+        for model_name, model in models.items():
+            if pairs is not None and (fs_name, model_name) not in pairs:
+                continue
+            signature = estimator_signature(Pipeline([("clf", model)]))
+            for params in (param_sets or {}).get(model_name, [{}]):
+                for repeat in range(n_repeats):
+                    for fold in range(folds):
+                        task = {
+                            "fs_name": fs_name,
+                            "model_name": model_name,
+                            "params": params,
+                            "fold": fold,
+                            "n_splits": folds,
+                            "random_state": random_state + repeat,
+                        }
+                        if scheme == "bootstrap":
+                            task["scheme"] = scheme
+                        task["hash"] = task_hash(task, X_hash, y_hash, signature)
+                        task["repeat"] = repeat
+                        tasks.append(task)
+    return tasks
+
+
+def task_split(task, y):
+    if task.get("scheme", "kfold") == "bootstrap":
+        # stratified bootstrap: every class is resampled to its own size; out-of-bag samples are the test set
+        rng = np.random.default_rng(task["random_state"])
+        train_idx = np.concatenate([rng.choice(np.flatnonzero(y == c), size=np.sum(y == c))
+                                    for c in np.unique(y)])
+        return train_idx, np.setdiff1d(np.arange(len(y)), train_idx)
+    cv = StratifiedKFold(n_splits=task["n_splits"], shuffle=True, random_state=task["random_state"])
+    return list(cv.split(np.zeros(len(y)), y))[task["fold"]]
+
+
+def score_predictions(est, X, y):
+    pred = est.predict(X)
+    scores = {"f1": f1_score(y, pred, average="weighted"), "accuracy": accuracy_score(y, pred), "auc": np.nan}
+    if hasattr(est, "predict_proba"):
+        try:
+            proba = est.predict_proba(X)
+            scores["auc"] = (roc_auc_score(y, proba[:, 1]) if proba.shape[1] == 2 else
+                             roc_auc_score(y, proba, multi_class="ovr", average="weighted", labels=est.classes_))
+        except ValueError:
+            pass        # a class missing from the test fold
+    return scores, pred
+
+
+# Scores expected if predictions were independent of the labels (no-information rate)
+def no_information_scores(y, pred):
+    labels = np.unique(np.concatenate([y, pred]))
+    p = np.array([np.mean(y == c) for c in labels])
+    q = np.array([np.mean(pred == c) for c in labels])
+    f1 = np.divide(2 * p * q, p + q, out=np.zeros_like(p), where=(p + q) > 0)
+    return {"f1": float(np.sum(p * f1)), "accuracy": float(np.sum(p * q)), "auc": 0.5}
+
+
+def run_task(task, X, y, estimator, n_threads=1):
+    y = np.asarray(y)
+    train_idx, test_idx = task_split(task, y)
+
+    result = {k: task[k] for k in ["hash", "fs_name", "model_name", "fold", "n_splits"]}
+    result["repeat"] = task.get("repeat", 0)
+    result["scheme"] = task.get("scheme", "kfold")
+    result["params"] = json.dumps(task["params"], default=str, sort_keys=True)
+    try:
+        est = set_threads(clone(estimator).set_params(**task["params"]), n_threads)
+        start = time.perf_counter()
+        est.fit(X[train_idx], y[train_idx])
+        result["fit_time"] = time.perf_counter() - start
+        start = time.perf_counter()
+        scores, _ = score_predictions(est, X[test_idx], y[test_idx])
+        result["score_time"] = time.perf_counter() - start
+        result.update(scores)
+        if result["scheme"] == "bootstrap":
+            # apparent (in-bag) and no-information scores for the .632+ estimate
+            apparent, pred = score_predictions(est, X[train_idx], y[train_idx])
+            result.update({f"{k}_apparent": v for k, v in apparent.items()})
+            result.update({f"{k}_noinfo": v for k, v in no_information_scores(y[train_idx], pred).items()})
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    return result
+
+
+# Backends: each yields results as tasks finish so they can be stored immediately
+# (loky is the process pool: its workers are not forked from the threaded parent)
+def _iter_serial(jobs, n_jobs):
+    for args in jobs:
+        yield run_task(*args)
+
+
+def _iter_loky(jobs, n_jobs):
+    yield from Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(run_task)(*args) for args in jobs
+    )
+
+
+def _iter_dask(jobs, n_jobs):
+    try:
+        from dask.distributed import Client, LocalCluster, as_completed
+    except ImportError:
+        raise ImportError("Please install 'dask[distributed]' for the dask backend: pip install \"dask[distributed]\"")
+    with LocalCluster(n_workers=n_jobs, threads_per_worker=1, processes=True) as cluster, Client(cluster) as client:
+        futures = [client.submit(run_task, *args, pure=False) for args in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_tasks(tasks, selected_datasets, y, models, backend="loky", n_jobs=None, store=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (choose from {BACKENDS})")
+
+    done = store.completed() if store is not None else {}
+    results = [done[t["hash"]] for t in tasks if t["hash"] in done]
+    todo = [t for t in tasks if t["hash"] not in done]
+    print(f" Executor ({backend}): {len(tasks)} tasks | {len(results)} already done | {len(todo)} to run")
+
+    if todo:
+        n_jobs = max(1, min(n_jobs or cpu_count(), len(todo)))
+        arrays = {name: X.values for name, X in selected_datasets.items()}
+        jobs = []
+        for t in todo:
+            X = arrays[t["fs_name"]]
+            estimator = Pipeline([("clf", models[t["model_name"]])])
+            _, inner = plan_parallelism(*X.shape, estimator, n_tasks=n_jobs)
+            jobs.append((t, X, y, estimator, inner))
+
+        iterate = {"serial": _iter_serial, "loky": _iter_loky, "dask": _iter_dask}[backend]
+        for result in iterate(jobs, n_jobs):
+            if store is not None:
+                store.put(result)
+            results.append(result)
+
+    order = {t["hash"]: i for i, t in enumerate(tasks)}
+    results.sort(key=lambda r: order[r["hash"]])
+    return pd.DataFrame(results, columns=None if results else ["hash", "fs_name", "model_name", "fold", "status"])
+
+
+# Task timings -> one profiler record per feature set and per (feature set, model), nested under
+# the current stage. Tasks run in worker processes, so wall_s here is the summed task time.
+def profile_tasks(fold_results):
+    if fold_results.empty:
+        return
+    df = fold_results.reindex(columns=["fs_name", "model_name", "status", "fit_time", "score_time"])
+    df["task_s"] = df["fit_time"].fillna(0) + df["score_time"].fillna(0)
+    for fs_name, fs_group in df.groupby("fs_name", sort=False):
+        for model_name, group in fs_group.groupby("model_name", sort=False):
+            profiler.record(f"{fs_name}/{model_name}", wall_s=group["task_s"].sum(),
+                            fit_s=group["fit_time"].sum(), n_fits=len(group),
+                            status="ok" if (group["status"] == "ok").all() else "failed", source="tasks")
+        profiler.record(fs_name, wall_s=fs_group["task_s"].sum(), fit_s=fs_group["fit_time"].sum(),
+                        n_fits=len(fs_group), status="ok" if (fs_group["status"] == "ok").all() else "failed",
+                        source="tasks")
+
+
+# Per-fold results -> one row per (feature set, model, params)
+def summarize_folds(fold_results):
+    ok = fold_results[fold_results["status"] == "ok"].reindex(
+        columns=["fs_name", "model_name", "params", "fold", "f1", "accuracy", "fit_time"])
+    return (
+        ok.groupby(["fs_name", "model_name", "params"], sort=False)
+        .agg(F1_mean=("f1", "mean"), F1_std=("f1", lambda s: s.std(ddof=0)),
+             Accuracy_mean=("accuracy", "mean"), n_folds=("fold", "count"),
+             fit_time=("fit_time", "sum"))
+        .reset_index()
+    )
+
+
+# Efron & Tibshirani (1997) .632+ estimate, computed on errors (1 - score) per bootstrap replicate
+def point632plus(oob, apparent, noinfo):
+    err_oob, err_app, gamma = 1 - np.asarray(oob), 1 - np.asarray(apparent), 1 - np.asarray(noinfo)
+    err_oob = np.minimum(err_oob, gamma)
+    overfit = (err_oob > err_app) & (gamma > err_app)
+    R = np.divide(err_oob - err_app, gamma - err_app, out=np.zeros_like(err_oob), where=overfit)
+    w = 0.632 / (1 - 0.368 * np.clip(R, 0, 1))
+    return 1 - ((1 - w) * err_app + w * err_oob)
+
+
+def _interval(group, metric, confidence):
+    if group["scheme"].iloc[0] == "bootstrap":
+        # percentile interval over the per-replicate .632+ scores
+        scores = point632plus(group[metric], group[f"{metric}_apparent"], group[f"{metric}_noinfo"])
+        scores = scores[~np.isnan(scores)]
+        if len(scores) == 0:
+            return np.nan, np.nan, np.nan, np.nan
+        low, high = np.percentile(scores, [50 * (1 - confidence), 50 * (1 + confidence)])
+        return scores.mean(), scores.std(ddof=0), low, high
+
+    # repeated k-fold: t-interval with the Nadeau & Bengio (2003) corrected variance,
+    # since folds share training data (test/train ratio = 1/(k-1))
+    scores = group[metric].dropna().to_numpy()
+    if len(scores) == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    k = group["n_splits"].iloc[0]
+    if len(scores) < 2 or k < 2:
+        return scores.mean(), scores.std(ddof=0), np.nan, np.nan
+    half = student_t.ppf((1 + confidence) / 2, len(scores) - 1) * np.sqrt(
+        (1 / len(scores) + 1 / (k - 1)) * scores.var(ddof=1))
+    return scores.mean(), scores.std(ddof=0), scores.mean() - half, scores.mean() + half
+
+
+# Per-fold / per-replicate results -> one row per (feature set, model, params) with confidence intervals
+def summarize_repeats(fold_results, confidence=0.95):
+    ok = fold_results[fold_results["status"] == "ok"]
+    rows = []
+    for (fs_name, model_name, params), group in ok.groupby(["fs_name", "model_name", "params"], sort=False):
+        row = {"fs_name": fs_name, "model_name": model_name, "params": params,
+               "scheme": group["scheme"].iloc[0], "n_repeats": group["repeat"].nunique(),
+               "n_folds": len(group), "fit_time": group["fit_time"].sum()}
+        for metric, label in [("f1", "F1"), ("accuracy", "Accuracy"), ("auc", "AUC")]:
+            mean, std, low, high = _interval(group, metric, confidence)
+            row.update({f"{label}_mean": mean, f"{label}_std": std,
+                        f"{label}_ci_low": low, f"{label}_ci_high": high})
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -2,7 +2,6 @@ import pandas as pd
 from ast import literal_eval
 from pathlib import Path
 import shap
-import matplotlib.pyplot as plt
 import os
 import warnings
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, StackingClassifier
@@ -10,26 +9,41 @@ from sklearn.svm import SVC
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
-import numpy as np
-
-
-def run_explainability():
+import joblib
+from src.profiling import profile_stage
+from src.resources import cpu_count, set_threads
+from src.results_store import ExperimentStore
+from src.visualization import plot_queue
+from src.inference import compile_model
+from src.shap_stream import explain_in_chunks
+
+
+# n_explain=None explains the whole test split; SHAP is computed chunk_size samples at a time
+#run_id limits the choice to that run's searches (selected_*.csv files belong to the latest run)
+def run_explainability(store=None, run_id=None, n_background=100, n_explain=50, chunk_size=32):
     print(" Running explainability pipeline: \n")
 
     warnings.filterwarnings("ignore", message="X has feature names")
 
-    #  Load halving results and find the best combination
-    halving_path = Path("data/halving_results.csv")
-    if not halving_path.exists():
-        raise FileNotFoundError(f" halving_results.csv not found in {halving_path.resolve()}")
+    #  Find the best combination (indexed lookup in the experiment store)
+    store_path = Path("data/experiments.sqlite")
+    if store is None and store_path.exists():
+        store = ExperimentStore(store_path)
+    best_row = store.best_search(run_id=run_id) if store is not None else None
+
+    if best_row is None:
+        # Older runs only have the CSV snapshot
+        halving_path = Path("data/halving_results.csv")
+        if not halving_path.exists():
+            raise FileNotFoundError(f" No stored searches and halving_results.csv not found in {halving_path.resolve()}")
+        df = pd.read_csv(halving_path)
+        best_row = df.loc[df["F1_score"].idxmax()].to_dict()
+        best_row["Best_params"] = literal_eval(str(best_row["Best_params"]))
 
-    df = pd.read_csv(halving_path)
-
-    best_row = df.loc[df["F1_score"].idxmax()]
     best_fs = best_row["FS_method"]
     best_model = best_row["Classifier"]
     best_f1 = best_row["F1_score"]
-    best_params = literal_eval(str(best_row["Best_params"]))
+    best_params = best_row["Best_params"]
 
     print(" Best pipeline found:")
     print(f" Feature Selection: {best_fs}")
@@ -56,8 +70,15 @@ def run_explainability():
         feature_names = selected_data.iloc[:, 0].tolist()
         full_df = pd.read_excel(data_path)
         y = full_df["label"]
-        X = full_df[feature_names]
-        print(f" Loaded dataset from Excel using {len(feature_names)} selected features.")
+        preprocessor_path = Path("data/preprocessor.joblib")
+        if preprocessor_path.exists():
+            # Same fitted Yeo-Johnson/standardization as training, applied in one pass
+            preprocessor = joblib.load(preprocessor_path)
+            X = preprocessor.transform(full_df)[feature_names]
+            print(f" Loaded dataset from Excel using {len(feature_names)} selected features (preprocessed).")
+        else:
+            X = full_df[feature_names]
+            print(f" Loaded dataset from Excel using {len(feature_names)} selected features.")
     else:
         X = selected_data
         y = pd.read_excel(data_path)["label"]
@@ -95,8 +116,11 @@ def run_explainability():
         ("scaler", StandardScaler()),
         ("clf", stacking_model)
     ])
+    # RF gets the threads, the stacking layer runs its two estimators serially
+    set_threads(model, cpu_count())
 
-    model.fit(X_train, y_train)
+    with profile_stage("fit_best_model", n_fits=1):
+        model.fit(X_train, y_train)
     print(" Model trained successfully.")
 
     
@@ -105,40 +129,40 @@ def run_explainability():
     print("\n Running SHAP explainability: ")
 
     stack_clf = model.named_steps["clf"]
-    X_sample = X_train.sample(min(100, len(X_train)), random_state=42)
-    explainer = shap.Explainer(stack_clf.predict_proba, X_sample)
-
-    X_test_sample = X_test.sample(min(50, len(X_test)), random_state=42)
-    shap_values = explainer(X_test_sample)
-
-    class_names = list(label_encoder.classes_)
+    X_sample = X_train.sample(min(n_background, len(X_train)), random_state=42)
+    # SHAP and LIME call predict_proba thousands of times: use the compiled array form
+    with profile_stage("compile_model"):
+        compiled = compile_model(stack_clf, X_check=X_sample)
+    joblib.dump(compiled, "data/best_model_compiled.joblib")
+    explainer = shap.Explainer(compiled.predict_proba, X_sample)
+
+    X_test_sample = X_test if n_explain is None else X_test.sample(min(n_explain, len(X_test)), random_state=42)
+    class_names = [str(c) for c in label_encoder.classes_]
     print(f"   Classes: {class_names}")
-    print(f"   SHAP shape: {np.array(shap_values.values).shape}")
-
-    # Summary plot
-    shap.summary_plot(
-        shap_values.values if shap_values.values.ndim == 2 else shap_values[..., 0],
-        X_test_sample,
-        show=False,
-        plot_size=(10, 6)
-    )
-    plt.tight_layout()
-    plt.savefig("results_explainability/shap_summary_plot.png", dpi=300)
-    plt.close()
-
-    # Bar plot
-    shap.summary_plot(
-        shap_values.values if shap_values.values.ndim == 2 else shap_values[..., 0],
-        X_test_sample,
-        show=False,
-        plot_type="bar",
-        plot_size=(10, 6)
-    )
-    plt.tight_layout()
-    plt.savefig("results_explainability/shap_bar_plot.png", dpi=300)
-    plt.close()
 
-    print(" Saved SHAP summary and bar plots.")
+    # Streamed: per-class / per-subtype statistics online, per-sample values spilled to a memmap
+    subtypes = label_encoder.inverse_transform(y_test[X_test.index.get_indexer(X_test_sample.index)]).astype(str)
+    with profile_stage("shap_values", n_samples=len(X_test_sample)):
+        shap_stats = explain_in_chunks(explainer, X_test_sample, class_names, groups=subtypes,
+                                       chunk_size=chunk_size, path="data/shap_values.npy")
+    print(f"   SHAP values: {shap_stats.values.shape} (memory-mapped: {shap_stats.path})")
+
+    importance = shap_stats.summary()
+    importance.to_csv("results_explainability/shap_importance.csv", index=False)
+    print(" SHAP importance per class and subtype saved to results_explainability/shap_importance.csv")
+
+    # Summary + bar plot per class (rendered in the background)
+    overall = importance[importance["group"] == "all"]
+    for c, class_name in enumerate(class_names):
+        idx, values = shap_stats.class_values(c)
+        plot_queue.submit("shap_summary", f"results_explainability/shap_summary_plot_{class_name}.png",
+                          values=values, features=X_test_sample.iloc[idx], title=f"SHAP — class {class_name}")
+        class_importance = overall[overall["class"] == class_name]
+        plot_queue.submit("importance_bar", f"results_explainability/shap_bar_plot_{class_name}.png",
+                          importance=class_importance["mean_abs_shap"].to_numpy(),
+                          features=class_importance["feature"].tolist(), title=f"Mean |SHAP| — class {class_name}")
+
+    print(f" Queued SHAP summary and bar plots for {len(class_names)} classes.")
 
   
     # LIME
@@ -151,7 +175,8 @@ def run_explainability():
             class_names=class_names,
             mode="classification"
         )
-        exp = lime_explainer.explain_instance(X_test_sample.iloc[0].values, stack_clf.predict_proba)
+        with profile_stage("lime"):
+            exp = lime_explainer.explain_instance(X_test_sample.iloc[0].values, compiled.predict_proba)
         os.makedirs("results_explainability/extended", exist_ok=True)
         exp.save_to_file("results_explainability/extended/lime_example.html")
         print(" LIME explanation saved as HTML.")
@@ -165,4 +190,5 @@ def run_explainability():
 # Entry point (so it can run standalone)
 if __name__ == "__main__":
     run_explainability()
+    plot_queue.wait()
 
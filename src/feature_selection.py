@@ -1,22 +1,25 @@
 
 #Import libraries + packages
+import time
 import numpy as np
 import pandas as pd
-from sklearn.feature_selection import SelectKBest, f_classif, RFE, mutual_info_classif
+from sklearn.feature_selection import SelectKBest, f_classif, RFE
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import f1_score
-from boruta import BorutaPy
+from scipy.stats import binom, false_discovery_control
+from threadpoolctl import threadpool_limits
+from src.relevance import mutual_information_scores, hsic_scores
+from src.resources import cpu_count
 from skrebate import ReliefF
 
 # Filter methods
 def fs_mrmr(X, y, top_k=30):
     print(f"Running mRMR (fallback) for {top_k} features: ")
-    mi = mutual_info_classif(X, y, random_state=42)
-    scores = pd.Series(mi, index=X.columns).sort_values(ascending=False)
+    scores = mutual_information_scores(X, y, random_state=42).sort_values(ascending=False)
     selected = []
     for feat in scores.index:
         if len(selected) >= top_k:
@@ -31,7 +34,7 @@ def fs_mrmr(X, y, top_k=30):
 def fs_relieff(X, y, top_k=30):
     print(f" Running ReliefF for {top_k} features:")
     X_scaled = StandardScaler().fit_transform(X)
-    relief = ReliefF(n_neighbors=20, n_features_to_select=top_k, n_jobs=-1)
+    relief = ReliefF(n_neighbors=20, n_features_to_select=top_k, n_jobs=cpu_count())
     relief.fit(X_scaled, y)
     feats = X.columns[relief.top_features_[:top_k]].tolist()
     print(f"ReliefF selected {len(feats)} features.")
@@ -68,22 +71,78 @@ def fs_ses(X, y, alpha=0.1):
 
 
 # WRAPPER METHODS
-def fs_boruta(X, y):
-    print("Running Boruta feature selection:")
-    rf = RandomForestClassifier(
-        n_jobs=-1,
-        class_weight="balanced",
-        max_depth=7,          
-        random_state=42
-    )
-    bor = BorutaPy(
-        estimator=rf,
-        n_estimators="auto",
-        perc=80,              
-        random_state=42
-    )
-    bor.fit(X.values, y)
-    selected = X.columns[bor.support_].tolist()
+# Boruta: rejected features are dropped from the forest, so later iterations fit smaller forests.
+# Confirmed features stay in as columns (with their shadows) so the tentative ones still compete
+# against them, but they are no longer tested
+def _boruta_model(engine, n_estimators, n_jobs, seed):
+    if engine == "rf":
+        return RandomForestClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                      max_depth=7, n_jobs=n_jobs, random_state=seed)
+    if engine == "extra":
+        return ExtraTreesClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                    max_depth=7, n_jobs=n_jobs, random_state=seed)
+    if engine == "lgbm":
+        from lightgbm import LGBMClassifier
+        return LGBMClassifier(n_estimators=n_estimators, max_depth=7, importance_type="gain",
+                              class_weight="balanced", n_jobs=n_jobs, random_state=seed, verbose=-1)
+    raise ValueError(f"Unknown Boruta engine: {engine}")
+
+
+def _boruta_n_estimators(n_active, depth=7):
+    # Same "auto" rule as BorutaPy, evaluated on the features still in play
+    multi = (n_active * 2) / (np.sqrt(n_active * 2) * depth)
+    return max(int(multi * 100), 50)
+
+
+def fs_boruta(X, y, engine="rf", perc=80, alpha=0.05, max_iter=100, time_budget=None,
+              n_jobs=None, random_state=42):
+    print(f"Running Boruta feature selection ({engine} importance):")
+    n_jobs = n_jobs or cpu_count()
+    rng = np.random.default_rng(random_state)
+    X_values = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    n_samples, n_features = X_values.shape
+
+    status = np.zeros(n_features, dtype=int)      # 0 tentative, 1 confirmed, -1 rejected
+    hits = np.zeros(n_features, dtype=int)
+    X_ext = np.empty((n_samples, 2 * n_features), dtype=np.float32)   # reused shadow buffer
+    start = time.perf_counter()
+
+    it = 0
+    while it < max_iter:
+        if not (status == 0).any():
+            break
+        if time_budget is not None and time.perf_counter() - start > time_budget:
+            print(f" Boruta time budget ({time_budget}s) reached after {it} iterations.")
+            break
+        it += 1
+        in_play = np.flatnonzero(status != -1)
+        tentative = status[in_play] == 0
+        active = in_play[tentative]
+        k = len(in_play)
+
+        # Real + shadow columns of the non-rejected features, written into the same buffer
+        X_ext[:, :k] = X_values[:, in_play]
+        X_ext[:, k:2 * k] = rng.permuted(X_ext[:, :k], axis=0)
+
+        model = _boruta_model(engine, _boruta_n_estimators(k), n_jobs, int(rng.integers(2**31 - 1)))
+        with threadpool_limits(limits=1, user_api="blas"):
+            model.fit(X_ext[:, :2 * k], y)
+        imp = np.asarray(model.feature_importances_, dtype=float)
+        threshold = np.percentile(imp[k:2 * k], perc)
+        hits[active] += imp[:k][tentative] > threshold
+
+        # Two-step correction (FDR + Bonferroni over iterations), as in BorutaPy
+        p_accept = binom.sf(hits[active] - 1, it, 0.5)
+        p_reject = binom.cdf(hits[active], it, 0.5)
+        accept = (false_discovery_control(p_accept) <= alpha) & (p_accept <= alpha / it)
+        reject = (false_discovery_control(p_reject) <= alpha) & (p_reject <= alpha / it)
+        status[active[accept]] = 1
+        status[active[reject]] = -1
+
+    print(f" Boruta finished after {it} iterations ({time.perf_counter() - start:.1f}s): "
+          f"{(status == 1).sum()} confirmed, {(status == 0).sum()} tentative, {(status == -1).sum()} rejected")
+    selected = X.columns[status == 1].tolist()
     print(f" Boruta selected {len(selected)} features.")
     return selected
 
@@ -112,7 +171,7 @@ def fs_genetic(X, y, top_k=20, generations=8, pop_size=25):
             if len(subset) == 0:
                 scores.append(0)
                 continue
-            clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+            clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=cpu_count())
             cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
             f1s = []
             for train, val in cv.split(X, y):
@@ -158,19 +217,22 @@ def fs_lasso(X, y):
     return feats
 
 
-def fs_hsic_lasso(X, y, top_k=20):
+def fs_hsic_lasso(X, y, top_k=20, prescreen=200, B=20, M=3):
     try:
         from pyHSICLasso import HSICLasso
-        print("Running HSIC-Lasso...")
-        hsic = HSICLasso()
-        hsic.input(np.array(X), np.array(y))
-        hsic.classification(top_k)
-        feats = [X.columns[i] for i in hsic.get_index()]
-        print(f"HSIC-Lasso selected {len(feats)} features.")
-        return feats
     except ImportError:
         print("pyHSICLasso not installed. Skipping HSIC-Lasso.")
         return []
+    print("Running HSIC-Lasso...")
+    # Features are pre-screened by the (cached) Nyström HSIC score before the Lasso step
+    hsic_rank = hsic_scores(X, y).sort_values(ascending=False)
+    candidates = hsic_rank.index[:prescreen] if prescreen else X.columns
+    hsic = HSICLasso()
+    hsic.input(np.array(X[candidates]), np.array(y), featname=list(candidates))
+    hsic.classification(top_k, B=B, M=M)
+    feats = [candidates[i] for i in hsic.get_index()]
+    print(f"HSIC-Lasso selected {len(feats)} features.")
+    return feats
 
 
 def fs_rf_importance(X, y, top_k=30):
@@ -178,10 +240,26 @@ def fs_rf_importance(X, y, top_k=30):
     rf = RandomForestClassifier(
         n_estimators=500, 
         random_state=42, 
-        n_jobs=-1, 
+        n_jobs=cpu_count(), 
         class_weight="balanced"
     )
     rf.fit(X, y)
     feats = pd.Series(rf.feature_importances_, index=X.columns).nlargest(top_k).index.tolist()
     print(f"RF-importance selected {len(feats)} features.")
     return feats
+
+
+# Registry of selectors: name -> (function, default kwargs)
+# Module-level functions (not lambdas) so they can be shipped to worker processes.
+FS_METHODS = {
+    "mRMR": (fs_mrmr, {"top_k": 20}),
+    "ReliefF": (fs_relieff, {"top_k": 20}),
+    "CorrSF": (fs_corrsf, {"top_k": 20}),
+    "SES": (fs_ses, {"alpha": 0.1}),
+    "Boruta": (fs_boruta, {}),
+    "RFE-SVM": (fs_rfe_svm, {"n_features": 20}),
+    "Genetic": (fs_genetic, {"top_k": 20}),
+    "LASSO": (fs_lasso, {}),
+    "HSIC-LASSO": (fs_hsic_lasso, {"top_k": 20}),
+    "RF-Importance": (fs_rf_importance, {"top_k": 20}),
+}
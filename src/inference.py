@@ -0,0 +1,349 @@
+#Import libraries + packages
+import numpy as np
+from scipy.special import expit, softmax
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.decomposition import PCA
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import (
+    RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier,
+    StackingClassifier, VotingClassifier
+)
+from sklearn.neural_network import MLPClassifier
+from sklearn.dummy import DummyClassifier
+
+
+# Fitted estimators are exported to a plain spec: nested dicts of numpy arrays, one "op" per node.
+# Evaluating a spec is a handful of array operations, without sklearn's per-call validation.
+# Anything without an exporter is kept as an "sklearn" node and called directly.
+
+
+# --- exporters: fitted estimator -> spec ---
+def _export_pipeline(est):
+    return {"op": "pipeline", "steps": [export_model(step) for _, step in est.steps if step != "passthrough"]}
+
+
+def _export_scaler(est):
+    return {"op": "scaler",
+            "mean": est.mean_ if est.with_mean else None,
+            "scale": est.scale_ if est.with_std else None}
+
+
+def _export_pca(est):
+    components = est.components_
+    if est.whiten:
+        components = components / np.sqrt(est.explained_variance_)[:, None]
+    return {"op": "linear", "mean": est.mean_, "weights": components.T.copy(), "bias": None}
+
+
+def _export_svc(est):
+    if not est.probability:
+        return _export_sklearn(est)
+    # raw libsvm parameters (sklearn flips the public ones in the binary case)
+    sv = est.support_vectors_
+    starts = np.concatenate([[0], np.cumsum(est.n_support_)])
+    return {"op": "svc", "kernel": est.kernel, "gamma": est._gamma, "coef0": est.coef0, "degree": est.degree,
+            "support_vectors": sv, "sv_norms": np.einsum("ij,ij->i", sv, sv),
+            "dual_coef": est._dual_coef_, "intercept": est._intercept_, "starts": starts,
+            "prob_a": est._probA, "prob_b": est._probB, "n_classes": len(est.classes_)}
+
+
+# all trees of an ensemble flattened into one set of node arrays; leaves point to themselves
+def _flatten_trees(trees):
+    offsets, feature, threshold, left, right, value = [], [], [], [], [], []
+    n = 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left < 0
+        nodes = np.arange(t.node_count) + n
+        offsets.append(n)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        left.append(np.where(leaf, nodes, t.children_left + n))
+        right.append(np.where(leaf, nodes, t.children_right + n))
+        value.append(t.value[:, 0, :])
+        n += t.node_count
+    return {"roots": np.array(offsets), "feature": np.concatenate(feature), "threshold": np.concatenate(threshold),
+            "left": np.concatenate(left), "right": np.concatenate(right), "value": np.concatenate(value),
+            "depth": max(tree.tree_.max_depth for tree in trees), "trees": [tree.tree_ for tree in trees]}
+
+
+def _export_forest(est):
+    trees = est.estimators_ if hasattr(est, "estimators_") else [est]
+    spec = {"op": "forest", **_flatten_trees(trees)}
+    normalizer = spec["value"].sum(axis=1, keepdims=True)
+    spec["value"] = spec["value"] / np.where(normalizer == 0, 1, normalizer)
+    return spec
+
+
+def _export_gradient_boosting(est):
+    if not (est.init_ == "zero" or isinstance(est.init_, DummyClassifier)):
+        return _export_sklearn(est)
+    n_stages, n_outputs = est.estimators_.shape
+    spec = {"op": "gradient_boosting", **_flatten_trees(est.estimators_.ravel())}
+    # each regression tree feeds one raw output: spread its leaf values into that column
+    sizes = [tree.tree_.node_count for tree in est.estimators_.ravel()]
+    output = np.repeat(np.tile(np.arange(n_outputs), n_stages), sizes)
+    value = np.zeros((len(output), n_outputs))
+    value[np.arange(len(output)), output] = spec["value"][:, 0] * est.learning_rate
+    spec["value"] = value
+    spec["tree_output"] = np.tile(np.arange(n_outputs), n_stages)
+    spec["init"] = est._raw_predict_init(np.zeros((1, est.n_features_in_)))[0]
+    return spec
+
+
+def _export_mlp(est):
+    return {"op": "mlp", "weights": est.coefs_, "biases": est.intercepts_,
+            "activation": est.activation, "out_activation": est.out_activation_}
+
+
+def _export_stacking(est):
+    if est.final_estimator_ is None or any(m != "predict_proba" for m, e in zip(est.stack_method_, est.estimators_)
+                                           if e != "drop"):
+        return _export_sklearn(est)
+    return {"op": "stacking", "estimators": [export_model(e) for e in est.estimators_ if e != "drop"],
+            "drop_first": len(est.classes_) == 2, "passthrough": est.passthrough,
+            "final": export_model(est.final_estimator_)}
+
+
+def _export_voting(est):
+    if est.voting != "soft":
+        return _export_sklearn(est)
+    return {"op": "voting", "estimators": [export_model(e) for e in est.estimators_],
+            "weights": None if est._weights_not_none is None else np.asarray(est._weights_not_none, dtype=float)}
+
+
+def _export_sklearn(est):
+    return {"op": "sklearn", "estimator": est}
+
+
+EXPORTERS = {
+    Pipeline: _export_pipeline,
+    StandardScaler: _export_scaler,
+    PCA: _export_pca,
+    SVC: _export_svc,
+    DecisionTreeClassifier: _export_forest,
+    RandomForestClassifier: _export_forest,
+    ExtraTreesClassifier: _export_forest,
+    GradientBoostingClassifier: _export_gradient_boosting,
+    MLPClassifier: _export_mlp,
+    StackingClassifier: _export_stacking,
+    VotingClassifier: _export_voting,
+}
+
+
+def export_model(est):
+    return EXPORTERS.get(type(est), _export_sklearn)(est)
+
+
+# --- runtime: spec + X -> transformed X or class probabilities ---
+def _run_pipeline(spec, X):
+    for step in spec["steps"]:
+        X = run_spec(step, X)
+    return X
+
+
+def _run_scaler(spec, X):
+    if spec["mean"] is not None:
+        X = X - spec["mean"]
+    return X / spec["scale"] if spec["scale"] is not None else X
+
+
+def _run_linear(spec, X):
+    if spec["mean"] is not None:
+        X = X - spec["mean"]
+    X = X @ spec["weights"]
+    return X + spec["bias"] if spec["bias"] is not None else X
+
+
+def _kernel(spec, X):
+    sv = spec["support_vectors"]
+    if spec["kernel"] == "rbf":
+        d2 = np.einsum("ij,ij->i", X, X)[:, None] + spec["sv_norms"][None, :] - 2 * X @ sv.T
+        return np.exp(-spec["gamma"] * np.maximum(d2, 0))
+    if spec["kernel"] == "linear":
+        return X @ sv.T
+    if spec["kernel"] == "poly":
+        return (spec["gamma"] * X @ sv.T + spec["coef0"]) ** spec["degree"]
+    return np.tanh(spec["gamma"] * X @ sv.T + spec["coef0"])
+
+
+# libsvm pairwise coupling (Wu, Lin & Weng 2004, method 2), also used for two classes;
+# iterated per sample until it converges
+def _couple(r, n_classes):
+    n = r.shape[0]
+    Q = -r.transpose(0, 2, 1) * r
+    idx = np.arange(n_classes)
+    Q[:, idx, idx] = (r.transpose(0, 2, 1) ** 2).sum(axis=2) - r[:, idx, idx] ** 2
+    p = np.full((n, n_classes), 1.0 / n_classes)
+    eps = 0.005 / n_classes
+    active = np.arange(n)
+    for _ in range(max(100, n_classes)):
+        Qa, pa = Q[active], p[active]
+        Qp = np.einsum("nij,nj->ni", Qa, pa)
+        pQp = np.einsum("ni,ni->n", pa, Qp)
+        converged = np.abs(Qp - pQp[:, None]).max(axis=1) < eps
+        active, Qa, pa, Qp, pQp = active[~converged], Qa[~converged], pa[~converged], Qp[~converged], pQp[~converged]
+        if len(active) == 0:
+            break
+        for t in range(n_classes):
+            diff = (-Qp[:, t] + pQp) / Qa[:, t, t]
+            pa[:, t] += diff
+            pQp = (pQp + diff * (diff * Qa[:, t, t] + 2 * Qp[:, t])) / (1 + diff) ** 2
+            Qp = (Qp + diff[:, None] * Qa[:, t, :]) / (1 + diff)[:, None]
+            pa /= (1 + diff)[:, None]
+        p[active] = pa
+    return p
+
+
+def _run_svc(spec, X):
+    K = _kernel(spec, X)
+    starts, coef, k = spec["starts"], spec["dual_coef"], spec["n_classes"]
+    r = np.zeros((X.shape[0], k, k))
+    pair = 0
+    for i in range(k):
+        si = slice(starts[i], starts[i + 1])
+        for j in range(i + 1, k):
+            sj = slice(starts[j], starts[j + 1])
+            dec = K[:, si] @ coef[j - 1, si] + K[:, sj] @ coef[i, sj] + spec["intercept"][pair]
+            # Platt sigmoid, clipped as in libsvm
+            prob = np.clip(expit(-(dec * spec["prob_a"][pair] + spec["prob_b"][pair])), 1e-7, 1 - 1e-7)
+            r[:, i, j], r[:, j, i] = prob, 1 - prob
+            pair += 1
+    return _couple(r, k)
+
+
+# above this many (row, tree) pairs, walking each tree in sklearn's compiled apply() is faster
+TREE_BATCH_CELLS = 20_000
+
+
+# sum of the leaf values reached by each row over all trees;
+# trees compare float32 features against float64 thresholds
+def _sum_trees(spec, X):
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    value = spec["value"]
+    if X.shape[0] * len(spec["roots"]) > TREE_BATCH_CELLS:
+        total = np.zeros((X.shape[0], value.shape[1]))
+        if "tree_output" in spec:
+            for tree, root, k in zip(spec["trees"], spec["roots"], spec["tree_output"]):
+                total[:, k] += value[tree.apply(X) + root, k]
+        else:
+            for tree, root in zip(spec["trees"], spec["roots"]):
+                total += value[tree.apply(X) + root]
+        return total
+    # small batches: all trees traversed at once, one vectorized step per level
+    flat = X.ravel()
+    base = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+    node = np.broadcast_to(spec["roots"], (X.shape[0], len(spec["roots"])))
+    for _ in range(spec["depth"]):
+        go_left = flat[base + spec["feature"][node]] <= spec["threshold"][node]
+        node = np.where(go_left, spec["left"][node], spec["right"][node])
+    return value[node].sum(axis=1)
+
+
+def _run_forest(spec, X):
+    return _sum_trees(spec, X) / len(spec["roots"])
+
+
+def _run_gradient_boosting(spec, X):
+    raw = spec["init"] + _sum_trees(spec, X)
+    if raw.shape[1] == 1:
+        p = expit(raw[:, 0])
+        return np.column_stack([1 - p, p])
+    return softmax(raw, axis=1)
+
+
+_ACTIVATIONS = {
+    "identity": lambda z: z,
+    "relu": lambda z: np.maximum(z, 0),
+    "tanh": np.tanh,
+    "logistic": expit,
+}
+
+
+def _run_mlp(spec, X):
+    n_layers = len(spec["weights"])
+    for i, (W, b) in enumerate(zip(spec["weights"], spec["biases"])):
+        X = X @ W + b
+        if i < n_layers - 1:
+            X = _ACTIVATIONS[spec["activation"]](X)
+    if spec["out_activation"] == "softmax":
+        return softmax(X, axis=1)
+    p = expit(X[:, 0])
+    return np.column_stack([1 - p, p])
+
+
+def _run_stacking(spec, X):
+    meta = [run_spec(e, X) for e in spec["estimators"]]
+    meta = [p[:, 1:] if spec["drop_first"] else p for p in meta]
+    if spec["passthrough"]:
+        meta.append(X)
+    return run_spec(spec["final"], np.hstack(meta))
+
+
+def _run_voting(spec, X):
+    return np.average([run_spec(e, X) for e in spec["estimators"]], axis=0, weights=spec["weights"])
+
+
+def _run_sklearn(spec, X):
+    est = spec["estimator"]
+    return est.predict_proba(X) if hasattr(est, "predict_proba") else est.transform(X)
+
+
+RUNNERS = {
+    "pipeline": _run_pipeline,
+    "scaler": _run_scaler,
+    "linear": _run_linear,
+    "svc": _run_svc,
+    "forest": _run_forest,
+    "gradient_boosting": _run_gradient_boosting,
+    "mlp": _run_mlp,
+    "stacking": _run_stacking,
+    "voting": _run_voting,
+    "sklearn": _run_sklearn,
+}
+
+
+def run_spec(spec, X):
+    return RUNNERS[spec["op"]](spec, X)
+
+
+def _iter_specs(spec):
+    yield spec
+    for child in spec.get("steps", []) + spec.get("estimators", []) + ([spec["final"]] if "final" in spec else []):
+        yield from _iter_specs(child)
+
+
+# Compiled predict_proba / predict for a fitted classifier (picklable with joblib)
+class CompiledModel:
+    def __init__(self, spec, classes):
+        self.spec = spec
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return run_spec(self.spec, X.reshape(1, -1) if X.ndim == 1 else X)
+
+    # argmax of predict_proba (for a bare SVC this can differ from sklearn's vote-based predict)
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def fallback_ops(self):
+        return sorted({type(s["estimator"]).__name__ for s in _iter_specs(self.spec) if s["op"] == "sklearn"})
+
+
+#export a fitted classifier; with X_check the compiled probabilities are checked against sklearn's
+#and the plain estimator is kept if they disagree
+def compile_model(est, X_check=None, atol=1e-6):
+    compiled = CompiledModel(export_model(est), est.classes_)
+    if X_check is not None:
+        X_check = np.asarray(X_check, dtype=np.float64)
+        err = np.abs(compiled.predict_proba(X_check) - est.predict_proba(X_check)).max()
+        if not err <= atol:
+            print(f" Compiled {type(est).__name__} differs from sklearn (max |Δp| = {err:.2e}); using sklearn")
+            return CompiledModel(_export_sklearn(est), est.classes_)
+    fallback = compiled.fallback_ops()
+    if fallback:
+        print(f" Compiled {type(est).__name__} (kept as sklearn: {', '.join(fallback)})")
+    return compiled
@@ -51,7 +51,8 @@ def load_and_clean(path, id_col="case_id", target_col="label", min_class_size=10
 
     # --- Impute missing values ---
     imputer = SimpleImputer(strategy="median")
-    X = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
+    # keep the original row index so per-row metadata (e.g. centers) can still be aligned
+    X = pd.DataFrame(imputer.fit_transform(X), columns=X.columns, index=X.index)
 
     print(f"\n Clean dataset ready: {X.shape[0]} samples × {X.shape[1]} features")
     return X, y
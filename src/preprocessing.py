@@ -3,6 +3,9 @@ import numpy as np
 from sklearn.feature_selection import VarianceThreshold
 from scipy.stats import mannwhitneyu, kruskal
 from sklearn.preprocessing import PowerTransformer
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+from src.profiling import profile_stage
 
 # Variance filter
 def variance_filter(X, threshold=0.01):
@@ -34,3 +37,208 @@ def stat_filter(X, y, alpha=0.1):
         if p < alpha:
             selected.append(col)
     return X[selected]
+
+
+# Vectorized Yeo-Johnson with one lambda per column
+def yeo_johnson(X, lambdas):
+    X = np.asarray(X, dtype=np.float64)
+    lam = np.broadcast_to(lambdas, X.shape)
+    pos = X >= 0
+    out = np.empty_like(X)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lam0 = np.abs(lam) < 1e-8
+        lam2 = np.abs(lam - 2) < 1e-8
+        xp = np.where(pos, X, 0.0)
+        xn = np.where(pos, 0.0, -X)
+        out = np.where(pos & lam0, np.log1p(xp), out)
+        out = np.where(pos & ~lam0, (np.power(xp + 1, lam) - 1) / np.where(lam0, 1, lam), out)
+        out = np.where(~pos & lam2, -np.log1p(xn), out)
+        out = np.where(~pos & ~lam2, -(np.power(xn + 1, 2 - lam) - 1) / np.where(lam2, 1, 2 - lam), out)
+    return out
+
+
+# ComBat batch harmonization (Johnson, Li & Rabinovic 2007), parametric empirical Bayes.
+# All features are fitted at once: per-center sums come from one matrix product and the
+# EB iterations only need per-center sums of s and s², so they run on (centers × features) arrays.
+# The label (if given) is a design covariate, so center effects are estimated net of each center's
+# subtype mix; transform() needs no label and adjusts around the covariate-free grand mean.
+# Centers unseen at fit time are passed through without adjustment.
+class ComBatHarmonizer(BaseEstimator, TransformerMixin):
+    def __init__(self, mean_only=False, eb=True, tol=1e-4, max_iter=1000):
+        self.mean_only = mean_only
+        self.eb = eb
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def fit(self, X, centers, y=None):
+        values = np.asarray(X, dtype=np.float64)
+        self.centers_, codes = np.unique(np.asarray(centers).astype(str), return_inverse=True)
+        k = len(self.centers_)
+        onehot = np.eye(k)[codes]
+        n = onehot.sum(axis=0)[:, None]
+
+        # design = center indicators + class dummies (first class as reference)
+        if y is not None:
+            _, y_codes = np.unique(np.asarray(y), return_inverse=True)
+            covariates = np.eye(y_codes.max() + 1)[y_codes][:, 1:]
+        else:
+            covariates = np.empty((len(values), 0))
+        design = np.hstack([onehot, covariates])
+        beta = np.linalg.lstsq(design, values, rcond=None)[0]
+
+        # pooled mean/variance after removing center and class effects
+        self.grand_mean_ = (n[:, 0] / len(values)) @ beta[:k]
+        var = ((values - design @ beta) ** 2).mean(axis=0)
+        self.var_pooled_ = np.where(var > 0, var, 1.0)
+        s = (values - self.grand_mean_ - covariates @ beta[k:]) / np.sqrt(self.var_pooled_)
+
+        # per-center location/scale of the standardized data
+        sum_s = onehot.T @ s
+        sum_s2 = onehot.T @ s ** 2
+        gamma_hat = sum_s / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta_hat = (sum_s2 - n * gamma_hat ** 2) / (n - 1)
+        delta_hat = np.where((n > 1) & (delta_hat > 0), delta_hat, 1.0)
+        if self.mean_only:
+            delta_hat = np.ones_like(delta_hat)
+
+        if self.eb:
+            gamma_star, delta_star = self._empirical_bayes(gamma_hat, delta_hat, sum_s, sum_s2, n)
+        else:
+            gamma_star, delta_star = gamma_hat, delta_hat
+        self.gamma_ = gamma_star
+        self.delta_ = delta_star
+        return self
+
+    def _empirical_bayes(self, gamma_hat, delta_hat, sum_s, sum_s2, n):
+        # priors across features, one per center
+        gamma_bar = gamma_hat.mean(axis=1, keepdims=True)
+        t2 = gamma_hat.var(axis=1, ddof=1, keepdims=True)
+        m = delta_hat.mean(axis=1, keepdims=True)
+        v = delta_hat.var(axis=1, ddof=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(v > 0, (2 * v + m ** 2) / v, np.inf)
+            b = np.where(v > 0, (m * v + m ** 3) / v, np.inf)
+
+        gamma, delta = gamma_hat, delta_hat
+        for _ in range(self.max_iter):
+            gamma_new = (t2 * n * gamma_hat + delta * gamma_bar) / (t2 * n + delta)
+            if self.mean_only:
+                return gamma_new, delta_hat
+            ss = sum_s2 - 2 * gamma_new * sum_s + n * gamma_new ** 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta_new = np.where(np.isfinite(a), (0.5 * ss + b) / (n / 2 + a - 1), delta_hat)
+                change = np.maximum(np.abs(gamma_new - gamma) / np.abs(gamma),
+                                    np.abs(delta_new - delta) / delta)
+            gamma, delta = gamma_new, delta_new
+            if np.nanmax(change) < self.tol:
+                break
+        return gamma, np.where(delta > 0, delta, 1.0)
+
+    def transform(self, X, centers):
+        check_is_fitted(self, "gamma_")
+        values = np.asarray(X, dtype=np.float64)
+        centers = np.asarray(centers).astype(str)
+        codes = np.searchsorted(self.centers_, centers)
+        known = (codes < len(self.centers_)) & (self.centers_[np.minimum(codes, len(self.centers_) - 1)] == centers)
+        if not known.all():
+            print(f" ComBat: unseen centers {sorted(set(centers[~known].tolist()))} left unadjusted")
+        codes = np.where(known, codes, 0)
+        gamma = np.where(known[:, None], self.gamma_[codes], 0.0)
+        delta = np.where(known[:, None], self.delta_[codes], 1.0)
+
+        sd = np.sqrt(self.var_pooled_)
+        out = ((values - self.grand_mean_) / sd - gamma) / np.sqrt(delta) * sd + self.grand_mean_
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(out, columns=X.columns, index=X.index)
+        return out
+
+    # copy restricted to the given feature indices (parameters are per feature)
+    def select_features(self, idx):
+        selected = ComBatHarmonizer(self.mean_only, self.eb, self.tol, self.max_iter)
+        selected.centers_ = self.centers_
+        selected.grand_mean_ = self.grand_mean_[idx]
+        selected.var_pooled_ = self.var_pooled_[idx]
+        selected.gamma_ = self.gamma_[:, idx]
+        selected.delta_ = self.delta_[:, idx]
+        return selected
+
+
+# Whole preprocessing chain as one fitted transformer:
+# Yeo-Johnson + standardize -> ComBat (if centers are given) -> variance filter -> correlation filter
+# -> Kruskal/Mann–Whitney filter.
+# Only the retained columns and their lambdas/means/scales/ComBat parameters are kept, so transform() is a
+# single column selection + vectorized power transform (no correlations or tests at inference).
+class RadiomicsPreprocessor(BaseEstimator, TransformerMixin):
+    def __init__(self, variance_threshold=0.01, corr_threshold=0.85, alpha=0.1, harmonize=True, verbose=True):
+        self.variance_threshold = variance_threshold
+        self.corr_threshold = corr_threshold
+        self.alpha = alpha
+        self.harmonize = harmonize
+        self.verbose = verbose
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def fit(self, X, y, centers=None):
+        X = pd.DataFrame(X)
+        pt = PowerTransformer(method="yeo-johnson", standardize=False)
+        with profile_stage("power_transform"):
+            Z = pt.fit_transform(X)
+        mean = Z.mean(axis=0)
+        scale = Z.std(axis=0)
+        scale = np.where(scale > 0, scale, 1.0)
+        Xt = pd.DataFrame((Z - mean) / scale, columns=X.columns, index=X.index)
+
+        harmonizer = None
+        if self.harmonize and centers is not None:
+            self._log(" ComBat harmonization across centers...")
+            with profile_stage("combat", n_features_in=Xt.shape[1]):
+                harmonizer = ComBatHarmonizer().fit(Xt, centers, y=np.asarray(y))
+                Xt = harmonizer.transform(Xt, centers)
+            self._log(f"   Harmonized {Xt.shape[1]} features over {len(harmonizer.centers_)} centers")
+
+        self._log(" VarianceThreshold filter...")
+        with profile_stage("variance_filter"):
+            Xt = variance_filter(Xt, threshold=self.variance_threshold)
+        self._log(f"   Remaining features: {Xt.shape[1]}")
+
+        self._log(" Removing highly correlated features: ")
+        with profile_stage("correlation_filter", n_features_in=Xt.shape[1]):
+            Xt = correlation_filter(Xt, threshold=self.corr_threshold)
+        self._log(f"   Remaining features: {Xt.shape[1]}")
+
+        self._log(" Kruskal/Mann–Whitney filtering: ")
+        with profile_stage("stat_filter", n_features_in=Xt.shape[1]):
+            Xt = stat_filter(Xt, np.asarray(y), alpha=self.alpha)
+        self._log(f"   Remaining features: {Xt.shape[1]}")
+
+        idx = X.columns.get_indexer(Xt.columns)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.selected_features_ = list(Xt.columns)
+        self.lambdas_ = pt.lambdas_[idx]
+        self.mean_ = mean[idx]
+        self.scale_ = scale[idx]
+        self.fill_values_ = X.iloc[:, idx].median().to_numpy()
+        self.harmonizer_ = harmonizer.select_features(idx) if harmonizer is not None else None
+        return self
+
+    # centers default to a "center" column of X (e.g. the raw Excel sheet)
+    def transform(self, X, centers=None):
+        check_is_fitted(self, "selected_features_")
+        X = pd.DataFrame(X)
+        values = X[self.selected_features_].to_numpy(dtype=np.float64)
+        bad = ~np.isfinite(values)
+        if bad.any():
+            values = np.where(bad, self.fill_values_, values)
+        Z = (yeo_johnson(values, self.lambdas_) - self.mean_) / self.scale_
+        if getattr(self, "harmonizer_", None) is not None:
+            if centers is None and "center" not in X.columns:
+                raise ValueError("This preprocessor was fitted with ComBat: pass centers (or a 'center' column)")
+            Z = self.harmonizer_.transform(Z, X["center"] if centers is None else centers)
+        return pd.DataFrame(Z, columns=self.selected_features_, index=X.index)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.selected_features_, dtype=object)
+
@@ -0,0 +1,148 @@
+#Import libraries + packages
+import os
+import json
+import time
+import resource
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Peak RSS of the process tree (main process + joblib/loky workers) while a stage runs;
+# pids in exclude (long-lived helpers such as the plot render workers) are not counted
+class _RSSSampler(threading.Thread):
+    def __init__(self, interval=0.05, exclude=()):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.exclude = exclude
+        self.peak = 0
+        self._stop_event = threading.Event()
+        self.child_cpu = {}
+
+    def _tree_rss(self):
+        # Also tracks CPU of live workers: loky keeps them alive, so RUSAGE_CHILDREN misses them
+        proc = psutil.Process()
+        rss = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            if child.pid in self.exclude:
+                continue
+            try:
+                rss += child.memory_info().rss
+                cpu = child.cpu_times()
+                self.child_cpu.setdefault(child.pid, [cpu.user + cpu.system])
+                self.child_cpu[child.pid][1:] = [cpu.user + cpu.system]
+            except psutil.Error:
+                pass
+        return rss
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self._tree_rss())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self._tree_rss())
+        return self.peak
+
+    def workers_cpu(self):
+        return sum(v[-1] - v[0] for v in self.child_cpu.values())
+
+
+def _children_cpu():
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+class RunProfiler:
+    def __init__(self, output_dir="data/profiling", cprofile=False):
+        self.output_dir = output_dir
+        self.cprofile = cprofile
+        self.records = []
+        self._stack = []
+        self._cprofile_active = False
+        self.excluded_pids = set()
+        self.started = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    @contextmanager
+    def stage(self, name, **meta):
+        full_name = "/".join(self._stack + [name])
+        record = {"stage": full_name, "depth": len(self._stack), "n_fits": 0, **meta}
+        self._stack.append(name)
+
+        sampler = _RSSSampler(exclude=self.excluded_pids) if psutil is not None else None
+        if sampler is not None:
+            sampler.start()
+
+        # cProfile cannot nest, so only the outermost profiled stage gets a dump
+        prof = None
+        if self.cprofile and not self._cprofile_active:
+            prof = cProfile.Profile()
+            self._cprofile_active = True
+            prof.enable()
+
+        wall0, cpu0, child0 = time.perf_counter(), time.process_time(), _children_cpu()
+        status = "ok"
+        try:
+            yield record
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            record["wall_s"] = time.perf_counter() - wall0
+            record["cpu_s"] = time.process_time() - cpu0
+            record["cpu_children_s"] = _children_cpu() - child0
+            record["status"] = status
+            if prof is not None:
+                prof.disable()
+                self._cprofile_active = False
+                prof_dir = os.path.join(self.output_dir, f"cprofile_{self.started}")
+                os.makedirs(prof_dir, exist_ok=True)
+                prof.dump_stats(os.path.join(prof_dir, full_name.replace("/", "__") + ".prof"))
+            if sampler is not None:
+                record["peak_rss_mb"] = sampler.stop() / 2**20
+                record["cpu_children_s"] += sampler.workers_cpu()
+            else:
+                # Lifetime peak of this process (KiB on Linux)
+                record["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self._stack.pop()
+            self.records.append(record)
+
+    # Record for work timed elsewhere (e.g. executor tasks in worker processes), nested under the
+    # current stage; "a/b" gives a record two levels down
+    def record(self, name, **fields):
+        parts = name.split("/")
+        record = {"stage": "/".join(self._stack + parts), "depth": len(self._stack) + len(parts) - 1,
+                  "n_fits": 0, **fields}
+        self.records.append(record)
+        return record
+
+    def report(self):
+        return pd.DataFrame(self.records)
+
+    def save(self):
+        if not self.records:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"run_{self.started}")
+        self.report().to_csv(base + ".csv", index=False)
+        with open(base + ".json", "w") as f:
+            json.dump({"started": self.started, "stages": self.records}, f, indent=2, default=str)
+        print(f"\n Profiling report saved to: {base}.json / .csv")
+        return base + ".json"
+
+
+# Shared profiler used by main.py and the src modules
+profiler = RunProfiler()
+
+
+def profile_stage(name, **meta):
+    return profiler.stage(name, **meta)
@@ -0,0 +1,99 @@
+#Import libraries + packages
+import os
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, hash as joblib_hash
+from sklearn.feature_selection import mutual_info_classif
+
+from src.resources import cpu_count
+
+
+# Disk cache: one CSV per (score kind, data, settings)
+def _cached_scores(kind, X, y, params, compute, cache_dir):
+    if cache_dir is None:
+        return compute()
+    key = joblib_hash((X, np.asarray(y), params))
+    path = os.path.join(cache_dir, f"{kind}_{key}.csv")
+    if os.path.exists(path):
+        print(f" Loaded cached {kind} scores ({os.path.basename(path)})")
+        return pd.read_csv(path, index_col=0).iloc[:, 0]
+    scores = compute()
+    os.makedirs(cache_dir, exist_ok=True)
+    scores.to_csv(path)
+    return scores
+
+
+def _column_blocks(n_features, block_size):
+    return [np.arange(s, min(s + block_size, n_features)) for s in range(0, n_features, block_size)]
+
+
+# Mutual information (kNN estimator), parallel over feature blocks
+def _mi_block(X_block, y, n_neighbors, random_state):
+    return mutual_info_classif(X_block, y, n_neighbors=n_neighbors, random_state=random_state)
+
+
+def mutual_information_scores(X, y, n_neighbors=3, random_state=42, block_size=64, n_jobs=None,
+                              cache_dir="data/relevance_cache"):
+    def compute():
+        blocks = _column_blocks(X.shape[1], block_size)
+        parts = Parallel(n_jobs=n_jobs or cpu_count())(
+            delayed(_mi_block)(X.iloc[:, b].values, y, n_neighbors, random_state) for b in blocks
+        )
+        return pd.Series(np.concatenate(parts), index=X.columns, name="MI")
+
+    params = {"n_neighbors": n_neighbors, "random_state": random_state}
+    return _cached_scores("MI", X, y, params, compute, cache_dir)
+
+
+# Normalized HSIC (Gaussian kernel on x, delta kernel on y) with Nyström features
+def _label_features(y):
+    # Delta kernel L_ij = 1/n_c if same class, as an explicit n x c feature map
+    classes, inv, counts = np.unique(y, return_inverse=True, return_counts=True)
+    Psi = np.zeros((len(y), len(classes)))
+    Psi[np.arange(len(y)), inv] = 1.0 / np.sqrt(counts[inv])
+    return Psi - Psi.mean(axis=0)
+
+
+def _hsic_block(X_block, Psi, landmarks, sigma):
+    # X_block: n x b (standardized). Build all b Nyström maps at once: b x n x m
+    Xb = X_block.T[:, :, None]
+    Lb = X_block[landmarks].T[:, None, :]
+    K_nm = np.exp(-(Xb - Lb) ** 2 / (2 * sigma ** 2))
+    K_mm = np.exp(-(Lb.transpose(0, 2, 1) - Lb) ** 2 / (2 * sigma ** 2))
+
+    w, V = np.linalg.eigh(K_mm)
+    w = np.where(w > 1e-8 * w.max(axis=1, keepdims=True), w, np.inf)
+    Phi = K_nm @ (V / np.sqrt(w)[:, None, :])
+    Phi -= Phi.mean(axis=1, keepdims=True)
+
+    hsic_xy = (np.einsum("bnm,nc->bmc", Phi, Psi) ** 2).sum(axis=(1, 2))
+    hsic_xx = (np.einsum("bnm,bnk->bmk", Phi, Phi) ** 2).sum(axis=(1, 2))
+    return hsic_xy, hsic_xx
+
+
+def hsic_scores(X, y, n_components=100, sigma=1.0, random_state=42, block_size=64, n_jobs=None,
+                cache_dir="data/relevance_cache"):
+    def compute():
+        y_arr = np.asarray(y)
+        Z = X.values.astype(np.float64)
+        std = Z.std(axis=0)
+        Z = (Z - Z.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+        rng = np.random.default_rng(random_state)
+        landmarks = rng.choice(len(Z), size=min(n_components, len(Z)), replace=False)
+        Psi = _label_features(y_arr)
+        hsic_yy = ((Psi.T @ Psi) ** 2).sum()
+
+        blocks = _column_blocks(X.shape[1], block_size)
+        parts = Parallel(n_jobs=n_jobs or cpu_count())(
+            delayed(_hsic_block)(Z[:, b], Psi, landmarks, sigma) for b in blocks
+        )
+        hsic_xy = np.concatenate([p[0] for p in parts])
+        hsic_xx = np.concatenate([p[1] for p in parts])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(hsic_xx > 0, hsic_xy / np.sqrt(hsic_xx * hsic_yy), 0.0)
+        return pd.Series(scores, index=X.columns, name="HSIC")
+
+    params = {"n_components": n_components, "sigma": sigma, "random_state": random_state}
+    return _cached_scores("HSIC", X, y, params, compute, cache_dir)
+
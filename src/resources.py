@@ -0,0 +1,85 @@
+#Import libraries + packages
+import os
+from contextlib import contextmanager
+from threadpoolctl import threadpool_limits
+
+# Models that parallelize internally (trees / OpenMP boosters / BLAS-heavy solvers)
+# and therefore benefit from inner threads when there are few outer tasks.
+INNER_PARALLEL_MODELS = (
+    "RandomForestClassifier", "ExtraTreesClassifier", "XGBClassifier", "LGBMClassifier",
+    "StackingClassifier", "VotingClassifier", "MLPClassifier", "KNeighborsClassifier",
+)
+
+# Below this many cells (samples x features) a fit is too short for threads to pay off
+SMALL_DATA_CELLS = 200_000
+
+_cpu_limit = None
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cpu_count():
+    # CPUs this process may use: the innermost cpu_limit() budget, else the whole machine
+    return _cpu_limit or available_cpus()
+
+
+@contextmanager
+def cpu_limit(n_cpus):
+    # Caps n_jobs defaults (via cpu_count) and the BLAS/OpenMP pools of this process.
+    # joblib/loky workers already get cpu_count // n_jobs BLAS threads each.
+    global _cpu_limit
+    previous = _cpu_limit
+    _cpu_limit = max(1, int(n_cpus))
+    try:
+        with threadpool_limits(limits=_cpu_limit):
+            yield _cpu_limit
+    finally:
+        _cpu_limit = previous
+
+
+def _model_classes(estimator):
+    names = {type(estimator).__name__}
+    for value in estimator.get_params(deep=True).values():
+        if hasattr(value, "get_params"):
+            names.add(type(value).__name__)
+    return names
+
+
+def plan_parallelism(n_samples, n_features, estimator, n_tasks, n_cpus=None):
+    # Split the CPU budget into outer workers (folds/candidates) x inner threads per fit
+    n_cpus = n_cpus or cpu_count()
+    outer = max(1, min(n_tasks, n_cpus))
+    inner = max(1, n_cpus // outer)
+
+    small = n_samples * n_features < SMALL_DATA_CELLS
+    if small or not _model_classes(estimator) & set(INNER_PARALLEL_MODELS):
+        inner = 1
+    return outer, inner
+
+
+def set_threads(estimator, n_threads):
+    # Innermost estimators get n_threads; meta-estimators wrapping them run serially,
+    # otherwise Stacking(n_jobs) x RF(n_jobs) multiplies the thread count.
+    keys = [k for k in estimator.get_params(deep=True) if k == "n_jobs" or k.endswith("__n_jobs")]
+    updates = {}
+    for key in keys:
+        prefix = key[: -len("n_jobs")]
+        nested = any(other != key and other.startswith(prefix) for other in keys)
+        updates[key] = 1 if nested else n_threads
+    if updates:
+        estimator.set_params(**updates)
+    return estimator
+
+
+@contextmanager
+def budget_for(estimator, n_samples, n_features, n_tasks):
+    # Usage: with budget_for(est, n, p, n_folds) as n_jobs: cross_val_score(est, ..., n_jobs=n_jobs)
+    outer, inner = plan_parallelism(n_samples, n_features, estimator, n_tasks)
+    set_threads(estimator, inner)
+    with threadpool_limits(limits=inner):
+        yield outer
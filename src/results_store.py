@@ -0,0 +1,242 @@
+#Import libraries + packages
+import os
+import json
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    started     TEXT NOT NULL,
+    data_hash   TEXT,
+    config_hash TEXT,
+    config      TEXT
+);
+CREATE TABLE IF NOT EXISTS searches (
+    search_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id       INTEGER REFERENCES runs(run_id),
+    search_key   TEXT,
+    fs_method    TEXT NOT NULL,
+    classifier   TEXT NOT NULL,
+    f1           REAL,
+    f1_std       REAL,
+    n_candidates INTEGER,
+    n_fits       INTEGER,
+    fit_seconds  REAL,
+    params       TEXT,
+    data_hash    TEXT,
+    config_hash  TEXT,
+    created      TEXT NOT NULL,
+    reused_from  INTEGER REFERENCES searches(search_id)
+);
+CREATE INDEX IF NOT EXISTS idx_searches_f1 ON searches (f1 DESC);
+CREATE INDEX IF NOT EXISTS idx_searches_combo ON searches (fs_method, classifier);
+CREATE INDEX IF NOT EXISTS idx_searches_key ON searches (search_key);
+CREATE INDEX IF NOT EXISTS idx_searches_run ON searches (run_id);
+CREATE TABLE IF NOT EXISTS search_params (
+    search_id  INTEGER REFERENCES searches(search_id),
+    name       TEXT NOT NULL,
+    value_num  REAL,
+    value_text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_search_params ON search_params (search_id);
+CREATE TABLE IF NOT EXISTS fold_scores (
+    search_id INTEGER REFERENCES searches(search_id),
+    fold      INTEGER NOT NULL,
+    f1        REAL
+);
+CREATE INDEX IF NOT EXISTS idx_fold_scores ON fold_scores (search_id);
+CREATE TABLE IF NOT EXISTS comparisons (
+    run_id        INTEGER REFERENCES runs(run_id),
+    fs_method     TEXT NOT NULL,
+    model         TEXT NOT NULL,
+    f1_mean       REAL,
+    f1_std        REAL,
+    accuracy_mean REAL,
+    f1_ci_low        REAL,
+    f1_ci_high       REAL,
+    accuracy_ci_low  REAL,
+    accuracy_ci_high REAL,
+    auc_mean         REAL,
+    auc_ci_low       REAL,
+    auc_ci_high      REAL,
+    n_repeats        INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_comparisons_run ON comparisons (run_id);
+CREATE TABLE IF NOT EXISTS tasks (
+    hash       TEXT PRIMARY KEY,
+    fs_name    TEXT,
+    model_name TEXT,
+    params     TEXT,
+    fold       INTEGER,
+    status     TEXT,
+    f1         REAL,
+    accuracy   REAL,
+    fit_time   REAL,
+    score_time REAL,
+    error      TEXT,
+    extra      TEXT
+);
+"""
+
+TASK_COLUMNS = ["hash", "fs_name", "model_name", "params", "fold", "status",
+                "f1", "accuracy", "fit_time", "score_time", "error"]
+
+
+def _to_json(value):
+    return json.dumps(value, default=lambda v: v.item() if isinstance(v, np.generic) else str(v), sort_keys=True)
+
+
+# Append-only experiment store (SQLite). Every write is committed immediately,
+# so a run that dies halfway keeps everything finished before it.
+class ExperimentStore:
+    def __init__(self, path="data/experiments.sqlite"):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # --- runs ---
+    def start_run(self, data_hash=None, config=None, config_hash=None):
+        cur = self.conn.execute(
+            "INSERT INTO runs (started, data_hash, config_hash, config) VALUES (?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec="seconds"), data_hash, config_hash, _to_json(config or {})),
+        )
+        self.conn.commit()
+        return cur.lastrowid
+
+    # --- halving searches ---
+    def add_search(self, fs_method, classifier, search, run_id=None, search_key=None,
+                   data_hash=None, config_hash=None, fit_seconds=None):
+        cv_results = search.cv_results_
+        best = search.best_index_
+        n_splits = search.n_splits_
+        folds = [cv_results[f"split{i}_test_score"][best] for i in range(n_splits)]
+
+        cur = self.conn.execute(
+            """INSERT INTO searches (run_id, search_key, fs_method, classifier, f1, f1_std, n_candidates,
+                                     n_fits, fit_seconds, params, data_hash, config_hash, created)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (run_id, search_key, fs_method, classifier, float(search.best_score_),
+             float(cv_results["std_test_score"][best]), len(set(map(_to_json, cv_results["params"]))),
+             len(cv_results["params"]) * n_splits + 1, fit_seconds, _to_json(search.best_params_),
+             data_hash, config_hash, datetime.now().isoformat(timespec="seconds")),
+        )
+        search_id = cur.lastrowid
+        self.conn.executemany(
+            "INSERT INTO search_params (search_id, name, value_num, value_text) VALUES (?, ?, ?, ?)",
+            [(search_id, name,
+              float(v) if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else None,
+              None if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else _to_json(v))
+             for name, v in search.best_params_.items()],
+        )
+        self.conn.executemany(
+            "INSERT INTO fold_scores (search_id, fold, f1) VALUES (?, ?, ?)",
+            [(search_id, i, float(s)) for i, s in enumerate(folds)],
+        )
+        self.conn.commit()
+        return search_id
+
+    # Record a stored search reused by this run under the current feature set/model names;
+    # scores, params and fold scores are copied and the row points at the original search
+    def reuse_search(self, search_id, fs_method, classifier, run_id=None, search_key=None,
+                     data_hash=None, config_hash=None):
+        cur = self.conn.execute(
+            """INSERT INTO searches (run_id, search_key, fs_method, classifier, f1, f1_std, n_candidates,
+                                     n_fits, fit_seconds, params, data_hash, config_hash, created, reused_from)
+               SELECT ?, ?, ?, ?, f1, f1_std, n_candidates, 0, 0, params, ?, ?, ?, COALESCE(reused_from, search_id)
+               FROM searches WHERE search_id = ?""",
+            (run_id, search_key, fs_method, classifier, data_hash, config_hash,
+             datetime.now().isoformat(timespec="seconds"), search_id),
+        )
+        new_id = cur.lastrowid
+        self.conn.execute(
+            "INSERT INTO search_params (search_id, name, value_num, value_text) "
+            "SELECT ?, name, value_num, value_text FROM search_params WHERE search_id = ?", (new_id, search_id))
+        self.conn.execute(
+            "INSERT INTO fold_scores (search_id, fold, f1) SELECT ?, fold, f1 FROM fold_scores WHERE search_id = ?",
+            (new_id, search_id))
+        self.conn.commit()
+        return new_id
+
+    def find_search(self, search_key):
+        row = self.conn.execute(
+            "SELECT search_id, fs_method, classifier, f1, params FROM searches "
+            "WHERE search_key = ? ORDER BY search_id DESC LIMIT 1", (search_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"search_id": row[0], "FS_method": row[1], "Classifier": row[2],
+                "F1_score": row[3], "Best_params": json.loads(row[4])}
+
+    def best_search(self, run_id=None):
+        query = "SELECT search_id, run_id, fs_method, classifier, f1, params FROM searches"
+        args = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+        row = self.conn.execute(query + " ORDER BY f1 DESC LIMIT 1", args).fetchone()
+        if row is None:
+            return None
+        return {"search_id": row[0], "run_id": row[1], "FS_method": row[2], "Classifier": row[3],
+                "F1_score": row[4], "Best_params": json.loads(row[5])}
+
+    def searches(self, run_id=None):
+        query = ("SELECT search_id, run_id, fs_method AS FS_method, classifier AS Classifier, "
+                 "f1 AS F1_score, f1_std, n_candidates, n_fits, fit_seconds, params AS Best_params, created, reused_from "
+                 "FROM searches")
+        args = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+        return pd.read_sql_query(query + " ORDER BY search_id", self.conn, params=args)
+
+    # --- untuned model comparison ---
+    # interval columns are only filled for repeated schemes (see executor.summarize_repeats)
+    def add_comparison(self, df_results, run_id=None):
+        columns = ["F1_mean", "F1_std", "Accuracy_mean", "F1_ci_low", "F1_ci_high", "Accuracy_ci_low",
+                   "Accuracy_ci_high", "AUC_mean", "AUC_ci_low", "AUC_ci_high", "n_repeats"]
+        df = df_results.reindex(columns=["FeatureSelection", "Model"] + columns)
+        self.conn.executemany(
+            f"INSERT INTO comparisons (run_id, fs_method, model, {', '.join(c.lower() for c in columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 3))})",
+            [(run_id, row[0], row[1], *(None if pd.isna(v) else v.item() if isinstance(v, np.generic) else v
+                                        for v in row[2:]))
+             for row in df.itertuples(index=False)],
+        )
+        self.conn.commit()
+
+    def comparisons(self, run_id=None):
+        query = "SELECT * FROM comparisons"
+        args = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+        return pd.read_sql_query(query, self.conn, params=args)
+
+    # --- executor task results: completed() + put(), used by executor.run_tasks ---
+    def completed(self):
+        rows = self.conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)}, extra FROM tasks WHERE status = 'ok'"
+        ).fetchall()
+        done = {}
+        for row in rows:
+            record = dict(zip(TASK_COLUMNS, row[:-1]))
+            record.update(json.loads(row[-1] or "{}"))
+            done[record["hash"]] = record
+        return done
+
+    def put(self, result):
+        extra = {k: v for k, v in result.items() if k not in TASK_COLUMNS}
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO tasks ({', '.join(TASK_COLUMNS)}, extra) VALUES ({', '.join('?' * (len(TASK_COLUMNS) + 1))})",
+            [result.get(c) for c in TASK_COLUMNS] + [_to_json(extra)],
+        )
+        self.conn.commit()
@@ -0,0 +1,87 @@
+#Import libraries + packages
+import math
+import numpy as np
+import pandas as pd
+from scipy.stats import t as student_t
+
+from src.executor import make_cv_tasks, run_tasks, profile_tasks
+from src.profiling import profile_stage
+
+# (fraction of samples, CV folds) per screening round; survivors then get full CV
+SCREENING_ROUNDS = ((0.34, 2), (0.67, 3))
+
+
+def stratified_subsample(y, fraction, random_state=42):
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+    idx = []
+    for cls in np.unique(y):
+        cls_idx = np.flatnonzero(y == cls)
+        n = min(len(cls_idx), max(2, int(round(fraction * len(cls_idx)))))
+        idx.append(rng.choice(cls_idx, size=n, replace=False))
+    return np.sort(np.concatenate(idx))
+
+
+def dominated_pairs(fold_scores, confidence=0.95):
+    # fold_scores: rows = (fs, model), columns = folds (all pairs scored on the same folds).
+    # A pair is dominated if a one-sided paired t-test says the round leader beats it.
+    leader = fold_scores.mean(axis=1).idxmax()
+    diffs = fold_scores.loc[leader].values[None, :] - fold_scores.values
+    n = diffs.shape[1]
+    mean = diffs.mean(axis=1)
+    se = diffs.std(axis=1, ddof=1) / np.sqrt(n) if n > 1 else np.full(len(diffs), np.inf)
+    lower = mean - student_t.ppf(confidence, max(n - 1, 1)) * se
+    dominated = (lower > 0) | ((se == 0) & (mean > 0))
+    return set(fold_scores.index[dominated])
+
+
+#successive screening: cheap rounds on growing subsamples drop dominated pairs,
+#then at most 1/eta of the pairs move on to the next round
+def screen_candidates(selected_datasets, y, models, rounds=SCREENING_ROUNDS, eta=3, min_keep=3,
+                      confidence=0.95, random_state=42, backend="loky", store=None):
+    y = np.asarray(y)
+    survivors = [(fs, m) for fs in selected_datasets for m in models]
+    log = []
+    print(f"\n Screening {len(survivors)} (feature set, model) pairs in {len(rounds)} rounds...")
+
+    for r, (fraction, n_splits) in enumerate(rounds, start=1):
+        idx = stratified_subsample(y, fraction, random_state=random_state + r)
+        sub_datasets = {fs: X.iloc[idx] for fs, X in selected_datasets.items()}
+        tasks = make_cv_tasks(sub_datasets, y[idx], models, n_splits=n_splits,
+                              random_state=random_state + r, pairs=set(survivors))
+        with profile_stage(f"round_{r}", n_fits=len(tasks)):
+            fold_results = run_tasks(tasks, sub_datasets, y[idx], models, backend=backend, store=store)
+            profile_tasks(fold_results)
+
+        ok = fold_results[fold_results["status"] == "ok"]
+        fold_scores = ok.pivot_table(index=["fs_name", "model_name"], columns="fold", values="f1").dropna()
+        failed = set(survivors) - set(fold_scores.index)
+        dominated = dominated_pairs(fold_scores, confidence) if len(fold_scores) > 1 else set()
+
+        means = fold_scores.mean(axis=1).drop(list(dominated)).sort_values(ascending=False)
+        n_keep = max(min_keep, math.ceil(len(survivors) / eta))
+        kept = list(means.index[:n_keep])
+
+        for pair in survivors:
+            status = ("failed" if pair in failed else "dominated" if pair in dominated
+                      else "promoted" if pair in kept else "cut")
+            log.append({
+                "round": r, "fraction": fraction, "n_samples": len(idx), "n_splits": n_splits,
+                "FeatureSelection": pair[0], "Model": pair[1],
+                "F1_mean": fold_scores.loc[pair].mean() if pair in fold_scores.index else np.nan,
+                "status": status,
+            })
+        print(f"   Round {r} ({len(idx)} samples, {n_splits}-fold): {len(survivors)} pairs → "
+              f"{len(kept)} promoted ({len(dominated)} dominated, {len(failed)} failed)")
+        survivors = kept
+
+    return survivors, pd.DataFrame(log)
+
+
+#pick what to tune from the full-CV results instead of a fixed list
+def select_for_tuning(df_results, n_feature_sets=3, n_models=None):
+    ranked = df_results.sort_values("F1_mean", ascending=False)
+    top_fs = list(dict.fromkeys(ranked["FeatureSelection"]))[:n_feature_sets]
+    candidates = ranked[ranked["FeatureSelection"].isin(top_fs)]
+    top_models = list(dict.fromkeys(candidates["Model"]))
+    return top_fs, top_models[:n_models] if n_models else top_models
@@ -0,0 +1,111 @@
+#Import libraries + packages
+import os
+import numpy as np
+import pandas as pd
+from src.profiling import profile_stage
+
+
+# Online SHAP statistics: per (group, feature, class) running count / mean / M2 of |SHAP|, plus the
+# signed mean and min/max. Chunks are merged with Chan's parallel update, so memory is independent
+# of the number of explained samples. Per-sample values go to a .npy memmap for later plotting.
+class ShapAggregator:
+    def __init__(self, n_samples, feature_names, class_names, groups=None, path="data/shap_values.npy"):
+        self.feature_names = list(feature_names)
+        self.class_names = list(class_names)
+        self.groups = list(groups) if groups is not None else ["all"]
+        self.path = path
+        shape = (len(self.groups), len(self.feature_names), len(self.class_names))
+        self.count = np.zeros(len(self.groups), dtype=np.int64)
+        self.mean_abs = np.zeros(shape)
+        self.m2_abs = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self.n_written = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.values = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float32, shape=(n_samples, len(self.feature_names), len(self.class_names)))
+        self.sample_groups = np.empty(n_samples, dtype=object)
+
+    def update(self, values, groups=None):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 2:
+            values = values[..., None]
+        start, stop = self.n_written, self.n_written + len(values)
+        self.values[start:stop] = values
+        self.n_written = stop
+
+        groups = np.asarray(groups if groups is not None else ["all"] * len(values), dtype=object)
+        self.sample_groups[start:stop] = groups
+        for g, name in enumerate(self.groups):
+            chunk = values[groups == name]
+            if len(chunk):
+                self._merge(g, chunk)
+
+    def _merge(self, g, chunk):
+        n_a, m = self.count[g], len(chunk)
+        n = n_a + m
+        abs_chunk = np.abs(chunk)
+        chunk_mean = abs_chunk.mean(axis=0)
+        delta = chunk_mean - self.mean_abs[g]
+        self.mean_abs[g] += delta * m / n
+        self.m2_abs[g] += ((abs_chunk - chunk_mean) ** 2).sum(axis=0) + delta ** 2 * n_a * m / n
+        self.mean[g] += (chunk.mean(axis=0) - self.mean[g]) * m / n
+        self.min[g] = np.minimum(self.min[g], chunk.min(axis=0))
+        self.max[g] = np.maximum(self.max[g], chunk.max(axis=0))
+        self.count[g] = n
+
+    def _pooled(self):
+        # merge the groups into cohort-wide statistics
+        n = self.count.sum()
+        w = (self.count / max(n, 1))[:, None, None]
+        mean_abs = (w * self.mean_abs).sum(axis=0)
+        m2 = (self.m2_abs + self.count[:, None, None] * (self.mean_abs - mean_abs) ** 2).sum(axis=0)
+        return n, mean_abs, m2, (w * self.mean).sum(axis=0), self.min.min(axis=0), self.max.max(axis=0)
+
+    def summary(self):
+        rows = []
+        stats = [(name, self.count[g], self.mean_abs[g], self.m2_abs[g], self.mean[g], self.min[g], self.max[g])
+                 for g, name in enumerate(self.groups)]
+        if len(self.groups) > 1:
+            stats.append(("all", *self._pooled()))
+        for group, n, mean_abs, m2, mean, lo, hi in stats:
+            if n == 0:
+                continue
+            std_abs = np.sqrt(m2 / n)
+            for c, class_name in enumerate(self.class_names):
+                rows.append(pd.DataFrame({
+                    "group": group, "class": class_name, "feature": self.feature_names, "n": n,
+                    "mean_abs_shap": mean_abs[:, c], "std_abs_shap": std_abs[:, c],
+                    "mean_shap": mean[:, c], "min_shap": lo[:, c], "max_shap": hi[:, c],
+                }))
+        return pd.concat(rows, ignore_index=True)
+
+    # (samples, features) values of one class, read from the memmap; at most max_samples rows
+    def class_values(self, class_index, group=None, max_samples=2000, random_state=42):
+        idx = np.arange(self.n_written)
+        if group is not None:
+            idx = idx[self.sample_groups[:self.n_written] == group]
+        if len(idx) > max_samples:
+            idx = np.sort(np.random.default_rng(random_state).choice(idx, max_samples, replace=False))
+        return idx, np.asarray(self.values[idx, :, class_index])
+
+    def flush(self):
+        self.values.flush()
+
+
+#explain X in chunks: only one chunk of SHAP values is in memory at a time
+def explain_in_chunks(explainer, X, class_names, groups=None, chunk_size=32, path="data/shap_values.npy"):
+    X = pd.DataFrame(X)
+    group_names = sorted(set(groups)) if groups is not None else None
+    groups = np.asarray(groups, dtype=object) if groups is not None else None
+    aggregator = ShapAggregator(len(X), X.columns, class_names, groups=group_names, path=path)
+    n_chunks = int(np.ceil(len(X) / chunk_size))
+    for i, start in enumerate(range(0, len(X), chunk_size)):
+        chunk = X.iloc[start:start + chunk_size]
+        with profile_stage(f"chunk_{i}", n_samples=len(chunk)):
+            values = explainer(chunk).values
+        aggregator.update(values, None if groups is None else groups[start:start + len(chunk)])
+        print(f"   SHAP chunk {i + 1}/{n_chunks}: {aggregator.n_written}/{len(X)} samples")
+    aggregator.flush()
+    return aggregator
@@ -1,9 +1,8 @@
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 from sklearn.model_selection import StratifiedKFold
 import os
+from src.visualization import plot_queue
 
 def split_and_check(X, y, centers=None, n_splits=3, random_state=42, n_trials=20, output_dir="data/split_report"):
 
@@ -78,27 +77,21 @@ def split_and_check(X, y, centers=None, n_splits=3, random_state=42, n_trials=20
         best_report["mean_center_std"] = mean_center_std
         print(f"\n mean_center_std: {mean_center_std:.2f}% (center distribution variability)")
 
-        # Save heatmap
-        plt.figure(figsize=(10, 4))
-        sns.heatmap(center_dist, annot=True, fmt=".1f", cmap="mako")
-        plt.title("Center (%) distribution per Fold — Grouped by center")
-        plt.xlabel("Center")
-        plt.ylabel("Fold")
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, "heterogeneity_centers_heatmap.png"), dpi=300)
-        plt.close()
+        # Save heatmap (rendered in the background)
+        plot_queue.submit(
+            "heatmap", os.path.join(output_dir, "heterogeneity_centers_heatmap.png"),
+            data=center_dist, title="Center (%) distribution per Fold — Grouped by center",
+            xlabel="Center", ylabel="Fold", cmap="mako", figsize=(10, 4)
+        )
 
     # === Label distribution heatmap ===
     label_dist = pd.crosstab(df_summary["Fold"], df_summary["Label"], normalize="index") * 100
-    plt.figure(figsize=(8, 4))
-    sns.heatmap(label_dist, annot=True, fmt=".1f", cmap="viridis")
-    plt.title("Class (%) distribution per Fold — Stratified by label")
-    plt.xlabel("Label")
-    plt.ylabel("Fold")
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, "heterogeneity_labels_heatmap.png"), dpi=300)
-    plt.close()
-    print(f"\n Saved heatmaps to: {output_dir}")
+    plot_queue.submit(
+        "heatmap", os.path.join(output_dir, "heterogeneity_labels_heatmap.png"),
+        data=label_dist, title="Class (%) distribution per Fold — Stratified by label",
+        xlabel="Label", ylabel="Fold", cmap="viridis", figsize=(8, 4)
+    )
+    print(f"\n Queued heatmaps for: {output_dir}")
 
     return best_splits, best_folds, best_report
 
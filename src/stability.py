@@ -0,0 +1,147 @@
+#Import libraries + packages
+import os
+import json
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, dump, load, hash as joblib_hash
+from sklearn.model_selection import StratifiedKFold
+
+from src.feature_selection import FS_METHODS
+from src.resources import cpu_count, cpu_limit
+
+
+# Resampling: index b always maps to the same subsample, so B can grow incrementally
+def resample_indices(y, b, scheme="subsample", sample_fraction=0.8, n_splits=5, random_state=42):
+    y = np.asarray(y)
+
+    if scheme == "cv":
+        # b enumerates (repeat, fold) pairs -> training part of that fold
+        repeat, fold = divmod(b, n_splits)
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state + repeat)
+        train_idx, _ = list(cv.split(np.zeros(len(y)), y))[fold]
+        return np.sort(train_idx)
+
+    rng = np.random.default_rng(random_state + b)
+    idx = []
+    for cls in np.unique(y):
+        cls_idx = np.flatnonzero(y == cls)
+        if scheme == "bootstrap":
+            idx.append(rng.choice(cls_idx, size=len(cls_idx), replace=True))
+        elif scheme == "subsample":
+            n = max(2, int(round(sample_fraction * len(cls_idx))))
+            idx.append(rng.choice(cls_idx, size=min(n, len(cls_idx)), replace=False))
+        else:
+            raise ValueError(f"Unknown resampling scheme: {scheme}")
+    return np.sort(np.concatenate(idx))
+
+
+# Worker: runs one selector on one resample of the memory-mapped matrix
+def _run_selector(method, kwargs, mmap_path, columns, y, idx, n_threads):
+    func, _ = FS_METHODS[method]
+    X_all = load(mmap_path, mmap_mode="r")
+    X = pd.DataFrame(np.asarray(X_all[idx]), columns=columns)
+    with cpu_limit(n_threads):
+        return list(func(X, pd.Series(y[idx]), **kwargs))
+
+
+# Stability indices
+def selection_matrix(selections, features):
+    pos = {f: i for i, f in enumerate(features)}
+    Z = np.zeros((len(selections), len(features)), dtype=bool)
+    for r, sel in enumerate(selections):
+        Z[r, [pos[f] for f in sel if f in pos]] = True
+    return Z
+
+
+def jaccard_index(Z):
+    Z = Z.astype(float)
+    inter = Z @ Z.T
+    sizes = Z.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - inter
+    iu = np.triu_indices(len(Z), k=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pair = np.where(union[iu] > 0, inter[iu] / union[iu], 1.0)
+    return float(pair.mean()) if len(pair) else np.nan
+
+
+def kuncheva_index(Z):
+    # Kuncheva consistency, with Lustgarten's correction for subsets of different size
+    Z = Z.astype(float)
+    n = Z.shape[1]
+    inter = Z @ Z.T
+    k = Z.sum(axis=1)
+    k1, k2 = k[:, None], k[None, :]
+    expected = k1 * k2 / n
+    max_overlap = np.minimum(k1, k2) - np.maximum(0, k1 + k2 - n)
+    iu = np.triu_indices(len(Z), k=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pair = (inter - expected)[iu] / (max_overlap - expected)[iu]
+    pair = pair[np.isfinite(pair)]
+    return float(pair.mean()) if len(pair) else np.nan
+
+
+def stability_selection(method, X, y, n_resamples=50, scheme="subsample", sample_fraction=0.8,
+                        n_splits=5, random_state=42, n_jobs=None, cache_dir="data/stability_cache",
+                        **kwargs):
+    if method not in FS_METHODS:
+        raise KeyError(f"Unknown feature selection method: {method}")
+    kwargs = {**FS_METHODS[method][1], **kwargs}
+    y = np.asarray(y)
+
+    # Cache key covers data + settings, but not n_resamples
+    key = joblib_hash((X, y, method, kwargs, scheme, sample_fraction, n_splits, random_state))
+    run_dir = os.path.join(cache_dir, method, key)
+    os.makedirs(run_dir, exist_ok=True)
+
+    selections = {}
+    for b in range(n_resamples):
+        path = os.path.join(run_dir, f"{b:04d}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                selections[b] = json.load(f)
+
+    todo = [b for b in range(n_resamples) if b not in selections]
+    print(f" Stability selection for {method}: {n_resamples} resamples "
+          f"({n_resamples - len(todo)} cached, {len(todo)} to run)")
+
+    if todo:
+        # Outer workers over resamples; the selectors' own n_jobs share what is left
+        n_cpus = n_jobs or cpu_count()
+        outer = max(1, min(len(todo), n_cpus))
+        inner = max(1, n_cpus // outer)
+
+        # One shared read-only copy of X for all workers
+        mmap_path = os.path.join(cache_dir, f"X_{key}.mmap")
+        dump(np.ascontiguousarray(X.values, dtype=np.float64), mmap_path)
+        try:
+            tasks = (
+                delayed(_run_selector)(
+                    method, kwargs, mmap_path, list(X.columns), y,
+                    resample_indices(y, b, scheme, sample_fraction, n_splits, random_state), inner
+                )
+                for b in todo
+            )
+            jobs = Parallel(n_jobs=outer, return_as="generator")(tasks)
+            for b, selected in zip(todo, jobs):
+                with open(os.path.join(run_dir, f"{b:04d}.json"), "w") as f:
+                    json.dump(selected, f)
+                selections[b] = selected
+        finally:
+            if os.path.exists(mmap_path):
+                os.remove(mmap_path)
+
+    runs = [selections[b] for b in range(n_resamples)]
+    Z = selection_matrix(runs, list(X.columns))
+    frequency = pd.Series(Z.mean(axis=0), index=X.columns, name="frequency").sort_values(ascending=False)
+    jaccard = jaccard_index(Z)
+    kuncheva = kuncheva_index(Z)
+
+    print(f" {method}: Jaccard={jaccard:.3f} | Kuncheva={kuncheva:.3f} | "
+          f"features selected at least once: {(frequency > 0).sum()}")
+
+    return {
+        "frequency": frequency,
+        "jaccard": jaccard,
+        "kuncheva": kuncheva,
+        "selections": runs,
+    }
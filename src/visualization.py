@@ -1,2 +1,156 @@
-from src.visualization import plot_results
-plot_results(results_df, "data/halving_results.png")
+#Import libraries + packages
+import os
+import glob
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import matplotlib
+from src.profiling import profiler
+
+
+# Plot functions: data in, PNG out. They only run inside render workers (Agg backend).
+def plot_heatmap(path, data, title, xlabel, ylabel, cmap="viridis", figsize=(8, 4), dpi=300):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.figure(figsize=figsize)
+    sns.heatmap(data, annot=True, fmt=".1f", cmap=cmap)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+
+def plot_halving_results(path, results_df, title, dpi=300):
+    import matplotlib.pyplot as plt
+    labels = results_df["FS_method"] + " / " + results_df["Classifier"]
+    plt.figure(figsize=(10, max(6, 0.3 * len(results_df))))
+    plt.barh(labels, results_df["F1_score"], color="skyblue")
+    plt.xlabel("Weighted F1-score")
+    plt.title(title)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+
+def plot_shap_summary(path, values, features, plot_type=None, title=None, dpi=300):
+    import matplotlib.pyplot as plt
+    import shap
+    shap.summary_plot(values, features, show=False, plot_type=plot_type, plot_size=(10, 6))
+    if title:
+        plt.title(title)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+
+# Bar chart of precomputed importances (e.g. streamed mean |SHAP|), no per-sample values needed
+def plot_importance_bar(path, importance, features, title=None, xlabel="mean |SHAP value|", top_n=20, dpi=300):
+    import numpy as np
+    import matplotlib.pyplot as plt
+    order = np.argsort(importance)[::-1][:top_n][::-1]
+    plt.figure(figsize=(10, max(4, 0.3 * len(order))))
+    plt.barh([features[i] for i in order], np.asarray(importance)[order], color="skyblue")
+    plt.xlabel(xlabel)
+    if title:
+        plt.title(title)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+
+PLOTTERS = {
+    "heatmap": plot_heatmap,
+    "halving": plot_halving_results,
+    "shap_summary": plot_shap_summary,
+    "importance_bar": plot_importance_bar,
+}
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+def render(spec):
+    os.makedirs(os.path.dirname(spec["path"]) or ".", exist_ok=True)
+    PLOTTERS[spec["kind"]](spec["path"], **spec["data"])
+    return spec["path"]
+
+
+# Background render queue: stages submit plot data and continue. Every spec is also
+# cached to disk, so all figures can be re-rendered later without recomputation.
+class PlotQueue:
+    def __init__(self, data_dir="data/plot_data", enabled=True, max_workers=2):
+        self.data_dir = data_dir
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self._pool = None
+        self._futures = []
+
+    def _get_pool(self):
+        if self._pool is None:
+            # fork keeps main.py from being re-imported by the workers; elsewhere render inline.
+            # Forking once other threads run (profiler sampler, executors) can deadlock, so the
+            # pool must be started up front with start(); if it was not, render inline as well.
+            if "fork" not in mp.get_all_start_methods() or threading.active_count() > 1:
+                return None
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("fork"),
+                                             initializer=_init_worker)
+            # the fork context launches every worker on the first submit, i.e. right here;
+            # the idle workers live for the whole run, so stages do not charge their RSS/CPU
+            self._futures.append(self._pool.submit(os.getpid))
+            profiler.excluded_pids.update(self._pool._processes)
+        return self._pool
+
+    # fork the render workers now, while the process is still single-threaded
+    def start(self):
+        if self.enabled:
+            self._get_pool()
+
+    def submit(self, kind, path, **data):
+        spec = {"kind": kind, "path": str(path), "data": data}
+        os.makedirs(self.data_dir, exist_ok=True)
+        name = str(path).replace(os.sep, "__").replace("/", "__")
+        joblib.dump(spec, os.path.join(self.data_dir, f"{name}.joblib"))
+
+        if not self.enabled:
+            return None
+        pool = self._get_pool()
+        if pool is None:
+            _init_worker()
+            return render(spec)
+        future = pool.submit(render, spec)
+        self._futures.append(future)
+        return future
+
+    def wait(self):
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f" Plot rendering failed: {e}")
+        self._futures = []
+        if self._pool is not None:
+            profiler.excluded_pids.difference_update(self._pool._processes)
+            self._pool.shutdown()
+            self._pool = None
+
+
+def render_all(data_dir="data/plot_data", max_workers=2):
+    specs = [joblib.load(f) for f in sorted(glob.glob(os.path.join(data_dir, "*.joblib")))]
+    if not specs:
+        print(f" No cached plot data found in {data_dir}")
+        return []
+    print(f" Rendering {len(specs)} figures from {data_dir}...")
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=_init_worker) as pool:
+        paths = list(pool.map(render, specs))
+    for p in paths:
+        print(f"   {p}")
+    return paths
+
+
+# Shared queue used by the pipeline modules
+plot_queue = PlotQueue()